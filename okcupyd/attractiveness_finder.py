@@ -1,5 +1,12 @@
+import collections
+import itertools
+import sqlite3
+import threading
+import time
+
 from .json_search import search
 from .session import Session
+from . import html_search
 from . import settings
 from . import util
 
@@ -9,11 +16,42 @@ class _AttractivenessFinder(object):
 
     This class is typically wrapped in several different attractiveness
     finder decorators that allow for cacheing of results and rounding.
+
+    With a `branching_factor` of k, each step of the search issues k - 1
+    range queries concurrently and narrows the searched interval by a factor
+    of k instead of 2.
     """
 
-    def __init__(self, session=None):
+    def __init__(self, session=None, branching_factor=2):
+        """
+        :param session: The session to search with.
+        :param branching_factor: The number of sub-intervals the search
+                                 interval is split into at each step.
+        """
         self._session = session or Session.login(settings.AF_USERNAME,
                                                  settings.AF_PASSWORD)
+        assert branching_factor >= 2
+        self._branching_factor = branching_factor
+
+    def _boundaries(self, lower, higher):
+        width = higher - lower
+        boundaries = [lower + (width * index)//self._branching_factor
+                      for index in range(1, self._branching_factor)]
+        return sorted(set(boundary for boundary in boundaries
+                          if lower < boundary < higher)) or [(higher + lower)//2]
+
+    def _found_in_range(self, username, attractiveness_min, attractiveness_max):
+        results = search(self._session,
+                         count=9,
+                         gentation='everybody',
+                         keywords=username,
+                         attractiveness_min=attractiveness_min,
+                         attractiveness_max=attractiveness_max,)
+        if results:
+            for profile in results:
+                if profile.username.lower() == username.lower():
+                    return True
+        return False
 
     def find_attractiveness(self, username, accuracy=1000,
                             _lower=0, _higher=10000):
@@ -27,25 +65,104 @@ class _AttractivenessFinder(object):
         if _higher - _lower <= accuracy:
             return average
 
-        results = search(self._session,
-                         count=9,
-                         gentation='everybody',
-                         keywords=username,
-                         attractiveness_min=average,
-                         attractiveness_max=_higher,)
-        found_match = False
-        if results:
-            for profile in results:
-                if profile.username.lower() == username:
-                    found_match = True
-                    break
+        boundaries = self._boundaries(_lower, _higher)
+        check = lambda boundary: self._found_in_range(username, boundary,
+                                                      _higher)
+        found = util.map_concurrently(check, boundaries,
+                                      concurrency=self._branching_factor - 1)
 
-        if found_match:
-            return self.find_attractiveness(username, accuracy,
-                                            average, _higher)
-        else:
-            return self.find_attractiveness(username, accuracy,
-                                            _lower, average)
+        # The queried ranges are nested, so the user is found in every range
+        # whose lower boundary is at or below their attractiveness.
+        new_lower, new_higher = _lower, _higher
+        for boundary, found_match in zip(boundaries, found):
+            if found_match:
+                new_lower = boundary
+            else:
+                new_higher = boundary
+                break
+        return self.find_attractiveness(username, accuracy,
+                                        new_lower, new_higher)
+
+    def _bucket_profiles(self, usernames, attractiveness_min,
+                         attractiveness_max, count):
+        # The html search is used because it registers the keywords and
+        # attractiveness filters that a bucket search depends on.
+        profiles = html_search.SearchFetchable(
+            self._session,
+            count=count,
+            gentation='everybody',
+            keywords=' '.join(sorted(usernames)),
+            attractiveness_min=attractiveness_min,
+            attractiveness_max=attractiveness_max
+        )
+        return itertools.islice(profiles, count)
+
+    def find_attractiveness_many(self, usernames, accuracy=1000,
+                                 _lower=0, _higher=10000, count=None,
+                                 results_per_username=9, group_size=10):
+        """Find the attractiveness of many users with shared searches.
+
+        The usernames are split into groups of at most `group_size`. For each
+        group, the attractiveness range is split into buckets of width
+        `accuracy` centred on the multiples of `accuracy`, and one search is
+        made per bucket for all of the users of the group that have not yet
+        been found. Each user gets the centre of the bucket they were found
+        in, which is what :class:`~.RoundedAttractivenessFinder` rounds a
+        bisection result to.
+
+        The number of searches grows with the number of groups rather than
+        with the number of usernames, and every search scans a bounded number
+        of results.
+
+        The usernames of a group are passed to okcupid as one space separated
+        `keywords` parameter, which relies on okcupid matching profiles with
+        any of the keywords. The tests only exercise this against mocked
+        searches.
+
+        :param usernames: The usernames to lookup attractiveness for.
+        :param accuracy: The width of each attractiveness bucket.
+        :param count: The maximum number of results to scan per bucket.
+                      Defaults to `results_per_username` for each username
+                      of the group that has not been found yet.
+        :param results_per_username: The number of results scanned per
+                                     username when `count` is None, as
+                                     :meth:`find_attractiveness` does for a
+                                     single username.
+        :param group_size: The maximum number of usernames searched for at
+                           once.
+        :returns: A dict from each username to its attractiveness, or None
+                  if the user was not found in any bucket.
+        """
+        unique_usernames = list(collections.OrderedDict.fromkeys(usernames))
+        username_to_attractiveness = dict.fromkeys(unique_usernames)
+        for start in range(0, len(unique_usernames), group_size):
+            group = unique_usernames[start:start + group_size]
+            username_to_attractiveness.update(self._find_group_attractiveness(
+                group, accuracy, _lower, _higher, count, results_per_username
+            ))
+        return username_to_attractiveness
+
+    def _find_group_attractiveness(self, usernames, accuracy, lower, higher,
+                                   count, results_per_username):
+        username_to_attractiveness = {}
+        pending = {username.lower(): username for username in usernames}
+        half_width = accuracy//2
+        for center in range(lower, higher + 1, accuracy):
+            if not pending:
+                break
+            bucket_lower = max(center - half_width, lower)
+            bucket_higher = min(center - half_width + accuracy, higher)
+            bucket_count = (count if count is not None
+                            else results_per_username * len(pending))
+            for profile in self._bucket_profiles(pending.values(),
+                                                 bucket_lower, bucket_higher,
+                                                 bucket_count):
+                username = pending.pop(profile.username.lower(), None)
+                if username is not None:
+                    username_to_attractiveness[username] = center
+                if not pending:
+                    break
+        return username_to_attractiveness
 
     __call__ = find_attractiveness
 
@@ -75,25 +192,252 @@ class CheckForExistenceAttractivenessFinder(AttractivenessFinderDecorator):
         if self._check_for_existence(username):
             return self._finder(username, *args, **kwargs)
 
+    def find_attractiveness_many(self, usernames, **kwargs):
+        # Users that do not exist are simply never found in any bucket.
+        return self._finder.find_attractiveness_many(usernames, **kwargs)
+
 
 class RoundedAttractivenessFinder(AttractivenessFinderDecorator):
 
     def find_attractiveness(self, *args, **kwargs):
-        unrounded = self._finder.find_attractiveness(*args, **kwargs)
+        return self._round(self._finder.find_attractiveness(*args, **kwargs))
+
+    def find_attractiveness_many(self, usernames, **kwargs):
+        return {
+            username: self._round(unrounded)
+            for username, unrounded in
+            self._finder.find_attractiveness_many(usernames, **kwargs).items()
+        }
+
+    @staticmethod
+    def _round(unrounded):
         if unrounded is not None:
             return int(round(float(unrounded)/1000, 0)*1000)
 
 
+class StoreStatistics(object):
+    """Count the lookups that were served from a store of attractiveness
+    values. Stores share their counts between every
+    :class:`~.CachedAttractivenessFinder` that uses them.
+    """
+
+    hits = 0
+    misses = 0
+
+    @property
+    def hit_rate(self):
+        """The portion of lookups that were served from the store."""
+        lookups = self.hits + self.misses
+        return float(self.hits)/lookups if lookups else 0.0
+
+
+class MemoryAttractivenessStore(StoreStatistics):
+    """An in process store of attractiveness values that evicts the least
+    recently used entry once `max_size` entries are held.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        """
+        :param max_size: The maximum number of entries to keep. Unbounded if
+                         None.
+        :param ttl: The number of seconds after which an entry expires.
+                    Entries never expire if None.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+
+    def __getitem__(self, username):
+        value, updated_at = self._entries.pop(username)
+        if _is_expired(updated_at, self.ttl):
+            raise KeyError(username)
+        self._entries[username] = (value, updated_at)
+        return value
+
+    def __setitem__(self, username, value):
+        self._entries.pop(username, None)
+        self._entries[username] = (value, time.time())
+        if self.max_size is not None:
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteAttractivenessStore(StoreStatistics):
+    """A store of attractiveness values kept in a SQLite database file so that
+    they can be shared between processes, sessions and accounts. Expired
+    entries are deleted when the store is opened and whenever it is written
+    to.
+    """
+
+    def __init__(self, file_path, ttl=None, timeout=30):
+        """
+        :param file_path: The path of the SQLite database file.
+        :param ttl: The number of seconds after which an entry expires.
+                    Entries never expire if None.
+        :param timeout: The number of seconds to wait for a lock held by
+                        another process.
+        """
+        self.file_path = file_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, timeout=timeout,
+                                           check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS attractiveness ('
+                'username TEXT PRIMARY KEY, attractiveness INTEGER, '
+                'updated_at REAL NOT NULL)'
+            )
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS attractiveness_updated_at '
+                'ON attractiveness (updated_at)'
+            )
+            self._purge_expired()
+
+    def _expired_before(self):
+        return 0 if self.ttl is None else time.time() - self.ttl
+
+    def _purge_expired(self):
+        if self.ttl is not None:
+            self._connection.execute(
+                'DELETE FROM attractiveness WHERE updated_at < ?',
+                (self._expired_before(),)
+            )
+
+    def __getitem__(self, username):
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT attractiveness, updated_at FROM attractiveness '
+                'WHERE username = ?', (username,)
+            ).fetchone()
+        if row is None or _is_expired(row[1], self.ttl):
+            raise KeyError(username)
+        return row[0]
+
+    def __setitem__(self, username, value):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO attractiveness '
+                '(username, attractiveness, updated_at) VALUES (?, ?, ?)',
+                (username, value, time.time())
+            )
+            self._purge_expired()
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM attractiveness WHERE updated_at >= ?',
+                (self._expired_before(),)
+            ).fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _is_expired(updated_at, ttl):
+    return ttl is not None and time.time() - updated_at > ttl
+
+
+_default_stores = {}
+_default_stores_lock = threading.Lock()
+
+
+def default_attractiveness_store():
+    """Get the store used by :class:`~.CachedAttractivenessFinder` when
+    none is provided, as configured in :mod:`~okcupyd.settings`. One store is
+    kept per configuration, so finders share their cache, their statistics
+    and, for a SQLite store, a single connection.
+    """
+    if settings.AF_CACHE_FILE:
+        key = (settings.AF_CACHE_FILE, settings.AF_CACHE_TTL)
+        build = lambda: SQLiteAttractivenessStore(settings.AF_CACHE_FILE,
+                                                  ttl=settings.AF_CACHE_TTL)
+    else:
+        key = (settings.AF_CACHE_SIZE, settings.AF_CACHE_TTL)
+        build = lambda: MemoryAttractivenessStore(
+            max_size=settings.AF_CACHE_SIZE, ttl=settings.AF_CACHE_TTL
+        )
+    with _default_stores_lock:
+        if key not in _default_stores:
+            _default_stores[key] = build()
+        return _default_stores[key]
+
+
 class CachedAttractivenessFinder(AttractivenessFinderDecorator):
 
-    def __init__(self, attractiveness_finder=None):
+    def __init__(self, attractiveness_finder=None, store=None):
+        """
+        :param attractiveness_finder: The finder whose results are cached.
+        :param store: A :class:`~.MemoryAttractivenessStore`,
+                      :class:`~.SQLiteAttractivenessStore` or any other
+                      mapping like object that raises `KeyError` for missing
+                      or expired entries.
+        """
         self._finder = attractiveness_finder or _AttractivenessFinder()
-        self._cache = {}
+        self._cache = store if store is not None else default_attractiveness_store()
+        #: The :class:`~.StoreStatistics` of the store, or of this finder if
+        #: the store does not count its own lookups.
+        self.statistics = (self._cache
+                           if isinstance(self._cache, StoreStatistics)
+                           else StoreStatistics())
+
+    @property
+    def hits(self):
+        return self.statistics.hits
+
+    @property
+    def misses(self):
+        return self.statistics.misses
+
+    @property
+    def hit_rate(self):
+        """The portion of lookups that were served from the cache."""
+        return self.statistics.hit_rate
+
+    def _lookup(self, username):
+        try:
+            value = self._cache[username.lower()]
+        except KeyError:
+            self.statistics.misses += 1
+            raise
+        self.statistics.hits += 1
+        return value
 
     def find_attractiveness(self, username, **kwargs):
-        if username not in self._cache:
-            self._cache[username] = self._finder(username, **kwargs)
-        return self._cache[username]
+        try:
+            return self._lookup(username)
+        except KeyError:
+            value = self._finder(username, **kwargs)
+            self._cache[username.lower()] = value
+            return value
+
+    def find_attractiveness_many(self, usernames, **kwargs):
+        username_to_attractiveness = {}
+        missing = []
+        for username in set(usernames):
+            try:
+                username_to_attractiveness[username] = self._lookup(username)
+            except KeyError:
+                missing.append(username)
+        if missing:
+            found = self._finder.find_attractiveness_many(missing, **kwargs)
+            for username, value in found.items():
+                # A user that was not found in any bucket may only have been
+                # cut off by the size of the bucket searches, so that is not
+                # cached the way a failed single lookup is.
+                if value is not None:
+                    self._cache[username.lower()] = value
+            username_to_attractiveness.update(found)
+        return username_to_attractiveness
 
 
 AttractivenessFinder = util.compose(CachedAttractivenessFinder,
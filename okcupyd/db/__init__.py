@@ -1,15 +1,21 @@
 import logging
 import os
 
+import simplejson
 from sqlalchemy import Column, DateTime, Integer
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import ColumnProperty, Query, class_mapper, sessionmaker
+from sqlalchemy.orm.interfaces import MANYTOONE
 from sqlalchemy.sql import func
+from sqlalchemy.sql.expression import Insert
 from wrapt import decorator
 
 from . import types
+from okcupyd import settings
 
 
 log = logging.getLogger(__name__)
@@ -21,12 +27,22 @@ class Query(Query):
 
 echo = False
 
-
-engine = create_engine('sqlite://', convert_unicode=True, echo=True)
+#: Pragmas that are set on every connection to a SQLite database. WAL lets
+#: readers proceed while a sync is writing.
+sqlite_pragmas = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 30000,
+}
+
+#: The engine that models are bound to. It is only created, from
+#: :data:`okcupyd.settings.DB_URL`, when the database is first used. See
+#: :func:`.get_engine`.
+engine = None
 Session = sessionmaker(
     autoflush=False,
     expire_on_commit=False,
-    bind=engine,
     query_cls=Query
 )
 
@@ -43,6 +59,8 @@ class txn(object):
         return wrapped
 
     def __enter__(self):
+        if Base.metadata.bind is None:
+            get_engine()
         self.session = self.session_class()
         return self.session
 
@@ -97,7 +115,8 @@ class Base(object):
             else:
                 id_to_model[model_id] = model
                 session.add(model)
-        log.info(id_to_model)
+        log.debug(simplejson.dumps({'upserted': len(id_to_model),
+                                    'model': cls.__name__}))
         return id_to_model
 
     @classmethod
@@ -106,13 +125,90 @@ class Base(object):
 
     upsert = with_txn(upsert_no_txn)
 
+    @classmethod
+    def bulk_upsert_no_txn(cls, session, models, id_key='id'):
+        """Insert `models`, updating the existing rows that have the same
+        value for `id_key`, with one executemany `INSERT ... ON CONFLICT DO
+        UPDATE` statement per distinct set of assigned attributes. Dialects
+        without native upserts fall back to :meth:`.upsert_no_txn`.
+
+        Only the attributes that were assigned on each model are written, so
+        the other columns of existing rows are left untouched, as with
+        `session.merge`. Models that do not assign `id_key` and every required
+        column are upserted with :meth:`.upsert_no_txn`. Assigned primary keys
+        are not written, so that rows only conflict on `id_key`.
+
+        :returns: A dict from the value of `id_key` to the persistent model of
+                  each upserted row.
+        """
+        dialect = session.get_bind().dialect
+        if not models or not _supports_upsert(dialect):
+            return cls.upsert_no_txn(session, models, id_key=id_key)
+        # Related models must have primary keys before they can be referenced.
+        session.flush()
+        required = set(column.key for column in cls.__table__.columns
+                       if not (column.nullable or column.primary_key or
+                               column.default is not None))
+        key_type = _python_type(getattr(cls, id_key))
+        id_to_row = {}
+        partial_models = []
+        for model in models:
+            row = model._upsert_row()
+            if id_key != 'id':
+                row.pop('id', None)
+            if id_key in row and required.issubset(row):
+                # The last row with a given key is the one that is written.
+                id_to_row[key_type(row[id_key])] = row
+            else:
+                # The database checks NOT NULL constraints before it
+                # resolves conflicts, so these can only update via the ORM.
+                partial_models.append(model)
+        keys_to_rows = {}
+        for row in id_to_row.values():
+            keys_to_rows.setdefault(tuple(sorted(row)), []).append(row)
+        for keys, rows in keys_to_rows.items():
+            session.execute(
+                _upsert_statement(dialect, cls.__table__, id_key, keys), rows
+            )
+        id_to_model = {}
+        if id_to_row:
+            id_to_model.update(
+                (getattr(model, id_key), model)
+                for model in cls.find_query(
+                    session, id_to_row, id_key=id_key
+                ).populate_existing()
+            )
+        if partial_models:
+            id_to_model.update(
+                cls.upsert_no_txn(session, partial_models, id_key=id_key)
+            )
+            session.flush()
+        log.debug(simplejson.dumps({'upserted': len(id_to_model),
+                                    'model': cls.__name__}))
+        return id_to_model
+
+    bulk_upsert = with_txn(bulk_upsert_no_txn)
+
+    def _upsert_row(self):
+        mapper = class_mapper(type(self))
+        row = {}
+        for relationship in mapper.relationships:
+            related = self.__dict__.get(relationship.key)
+            if relationship.direction is MANYTOONE and related is not None:
+                for local, remote in relationship.local_remote_pairs:
+                    row[local.key] = getattr(related, remote.key)
+        for prop in mapper.column_attrs:
+            if prop.key in self.__dict__:
+                row[prop.columns[0].key] = self.__dict__[prop.key]
+        return row
+
     @classmethod
     def safe_upsert(cls, *args, **kwargs):
         # TODO(imalison): use a retry decorator here.
         try:
-            return cls.upsert(*args, **kwargs)
+            return cls.bulk_upsert(*args, **kwargs)
         except IntegrityError:
-            return cls.upsert(*args, **kwargs)
+            return cls.bulk_upsert(*args, **kwargs)
 
     @classmethod
     def upsert_okc(cls, model, **kwargs):
@@ -147,27 +243,108 @@ class Base(object):
         return session.query(cls).filter(*args).filter_by(**kwargs)
 
 
-Base = declarative_base(engine, cls=Base)
+Base = declarative_base(cls=Base)
+
+
+def _python_type(attribute):
+    try:
+        return attribute.type.python_type
+    except NotImplementedError:
+        return lambda value: value
+
+
+def _supports_upsert(dialect):
+    if dialect.name == 'postgresql':
+        return True
+    if dialect.name == 'sqlite':
+        return dialect.dbapi.sqlite_version_info >= (3, 24, 0)
+    return False
+
+
+class _SQLiteUpsert(Insert):
+
+    def __init__(self, table, index_element, update_columns):
+        super(_SQLiteUpsert, self).__init__(table)
+        self.index_element = index_element
+        self.update_columns = update_columns
+
+
+@compiles(_SQLiteUpsert, 'sqlite')
+def _compile_sqlite_upsert(element, compiler, **kwargs):
+    statement = compiler.visit_insert(element, **kwargs)
+    preparer = compiler.preparer
+    if not element.update_columns:
+        return '{0} ON CONFLICT ({1}) DO NOTHING'.format(
+            statement, preparer.quote(element.index_element)
+        )
+    return '{0} ON CONFLICT ({1}) DO UPDATE SET {2}'.format(
+        statement, preparer.quote(element.index_element), ', '.join(
+            '{0} = excluded.{0}'.format(preparer.quote(column))
+            for column in element.update_columns
+        )
+    )
+
+
+def _upsert_statement(dialect, table, id_key, keys):
+    update_columns = [key for key in keys
+                      if key not in (id_key, 'id', 'created_at')]
+    if dialect.name == 'sqlite':
+        return _SQLiteUpsert(table, id_key, update_columns)
+    statement = postgresql.insert(table)
+    if not update_columns:
+        return statement.on_conflict_do_nothing(index_elements=[id_key])
+    return statement.on_conflict_do_update(
+        index_elements=[id_key],
+        set_={column: statement.excluded[column] for column in update_columns}
+    )
 
 
 class OKCBase(Base):
 
     __abstract__ = True
 
-    okc_id = Column(types.StringBackedInteger, nullable=False, unique=True)
+    okc_id = Column(types.UnsignedBigInteger, nullable=False, unique=True)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in sqlite_pragmas.items():
+        cursor.execute('PRAGMA {0} = {1}'.format(pragma, value))
+    cursor.close()
+
+
+def build_engine(url, **kwargs):
+    """Create an engine for `url`. SQLite connections are configured with
+    :data:`.sqlite_pragmas`.
+    """
+    kwargs.setdefault('convert_unicode', True)
+    kwargs.setdefault('echo', echo)
+    new_engine = create_engine(url, **kwargs)
+    if new_engine.dialect.name == 'sqlite':
+        event.listen(new_engine, 'connect', _set_sqlite_pragmas)
+    return new_engine
+
+
+def reset_engine(new_engine):
+    global engine
+    engine = new_engine
+    Session.configure(bind=new_engine)
+    Base.metadata.bind = new_engine
+    return new_engine
 
 
-def reset_engine(engine):
-    Session.configure(bind=engine)
-    Base.metadata.bind = engine
-    return engine
+def get_engine():
+    """Get the engine that models are bound to, creating it from
+    :data:`okcupyd.settings.DB_URL` if no engine has been set yet.
+    """
+    if Base.metadata.bind is None:
+        reset_engine(build_engine(settings.DB_URL or default_database_url))
+    return Base.metadata.bind
 
 
 def set_sqlite_db_file(file_path):
-    return reset_engine(create_engine('sqlite:///{0}'.format(file_path),
-                                      convert_unicode=True,
-                                      echo=echo))
+    return reset_engine(build_engine('sqlite:///{0}'.format(file_path)))
 
 
 database_uri = os.path.join(os.path.dirname(__file__), 'okcupyd.db')
-set_sqlite_db_file(database_uri)
+default_database_url = 'sqlite:///{0}'.format(database_uri)
@@ -1,6 +1,10 @@
 import logging
 
+from sqlalchemy.orm import subqueryload
+import six
+
 from okcupyd.db import model, txn, with_txn
+from okcupyd.util import map_concurrently
 
 
 log = logging.getLogger(__name__)
@@ -29,6 +33,74 @@ class UserAdapter(object):
     get = with_txn(get_no_txn)
 
 
+class UserResolver(object):
+    """Resolve many profiles or usernames to :class:`~okcupyd.db.model.User`
+    objects at once. The results are memoized, so a resolver should be shared
+    for the duration of a sync.
+    """
+
+    def __init__(self, okc_session=None, concurrency=4):
+        """
+        :param okc_session: The :class:`~okcupyd.session.Session` used to
+                            load the profiles of usernames that are not in
+                            the database. It may be omitted when only
+                            profiles are resolved.
+        :param concurrency: The number of profiles to load at once.
+        """
+        self._okc_session = okc_session
+        self._concurrency = concurrency
+        self._username_to_user = {}
+
+    def _profile(self, profile_or_username):
+        if isinstance(profile_or_username, six.string_types):
+            if self._okc_session is None:
+                raise ValueError(
+                    'An okc_session is required to resolve the username '
+                    '{0!r}, which is not in the database.'.format(
+                        profile_or_username
+                    )
+                )
+            return self._okc_session.get_profile(profile_or_username)
+        return profile_or_username
+
+    def resolve_no_txn(self, session, profiles_or_usernames):
+        """Find the users that are already known with one query and create
+        the rest, loading their profiles concurrently.
+
+        :returns: A dict from username to :class:`~okcupyd.db.model.User`.
+        """
+        username_to_item = {}
+        for item in profiles_or_usernames:
+            username = (item if isinstance(item, six.string_types)
+                        else item.username)
+            username_to_item.setdefault(username, item)
+        unknown = [name for name in username_to_item
+                   if name not in self._username_to_user]
+        if unknown:
+            for user in model.User.build_query(
+                session, model.User.handle.in_(unknown)
+            ):
+                self._username_to_user[user.handle] = user
+            new_users = map_concurrently(
+                lambda item: model.User.from_profile(self._profile(item)),
+                [username_to_item[name] for name in unknown
+                 if name not in self._username_to_user],
+                concurrency=self._concurrency
+            )
+            if new_users:
+                for user in model.User.bulk_upsert_no_txn(
+                    session, new_users, id_key='okc_id'
+                ).values():
+                    self._username_to_user[user.handle] = user
+        # Users memoized by an earlier transaction are attached to this one
+        # without querying for them again.
+        return {username: session.merge(self._username_to_user[username],
+                                        load=False)
+                for username in username_to_item}
+
+    resolve = with_txn(resolve_no_txn)
+
+
 class ThreadAdapter(object):
 
     def __init__(self, thread):
@@ -77,3 +149,112 @@ class ThreadAdapter(object):
         with txn() as session:
             thread_model = self._get_thread(session)
             return thread_model, self._add_messages(thread_model)
+
+
+class ThreadBatchAdapter(object):
+    """Write many threads and their new messages in a single transaction."""
+
+    def __init__(self, threads, user_resolver=None):
+        """
+        :param threads: The :class:`~okcupyd.messaging.MessageThread` objects
+                        to write.
+        :param user_resolver: The :class:`~.UserResolver` used to find the
+                              initiator and respondent of each thread.
+        """
+        self.threads = list(threads)
+        self.user_resolver = user_resolver or UserResolver()
+
+    def _get_threads(self, session):
+        username_to_user = self.user_resolver.resolve_no_txn(session, [
+            profile for thread in self.threads
+            for profile in (thread.initiator, thread.respondent)
+        ])
+        model.MessageThread.bulk_upsert_no_txn(session, [
+            model.MessageThread(
+                okc_id=thread.id,
+                initiator=username_to_user[thread.initiator.username],
+                respondent=username_to_user[thread.respondent.username]
+            ) for thread in self.threads
+        ], id_key='okc_id')
+        session.flush()
+        # Load the messages of every thread with one query rather than
+        # lazily loading them thread by thread in _add_messages.
+        okc_id_to_thread_model = {
+            thread_model.okc_id: thread_model
+            for thread_model in model.MessageThread.find_query(
+                session, [thread.id for thread in self.threads],
+                id_key='okc_id'
+            ).options(subqueryload(model.MessageThread.messages))
+        }
+        return [okc_id_to_thread_model[int(thread.id)]
+                for thread in self.threads]
+
+    def get_threads_no_txn(self, session):
+        """
+        :returns: A list of the :class:`~okcupyd.db.model.MessageThread` of
+                  each thread and a list of the
+                  :class:`~okcupyd.db.model.Message` objects that were added.
+        """
+        if not self.threads:
+            return [], []
+        thread_models = self._get_threads(session)
+        new_messages = []
+        for thread, thread_model in zip(self.threads, thread_models):
+            new_messages.extend(
+                ThreadAdapter(thread)._add_messages(thread_model)
+            )
+        return thread_models, new_messages
+
+    get_threads = with_txn(get_threads_no_txn)
+
+
+class ProfileSnapshotAdapter(object):
+    """Record a :class:`~okcupyd.db.model.ProfileSnapshot` of each of many
+    profiles, skipping the profiles whose content has not changed since
+    their latest snapshot.
+    """
+
+    def __init__(self, profiles, user_resolver=None, concurrency=4):
+        """
+        :param profiles: The :class:`~okcupyd.profile.Profile` objects to
+                         snapshot.
+        :param user_resolver: The :class:`~.UserResolver` used to find the
+                              users the profiles belong to.
+        :param concurrency: The number of profiles to load at once.
+        """
+        self.profiles = list(profiles)
+        self.user_resolver = user_resolver or UserResolver(
+            concurrency=concurrency
+        )
+        self._concurrency = concurrency
+
+    def save_no_txn(self, session, fetched_at=None):
+        """
+        :returns: The snapshots that were added.
+        """
+        contents = map_concurrently(
+            model.ProfileSnapshot.content_from_profile, self.profiles,
+            concurrency=self._concurrency
+        )
+        username_to_user = self.user_resolver.resolve_no_txn(session,
+                                                             self.profiles)
+        user_id_to_hash = {
+            snapshot.user_id: snapshot.content_hash
+            for snapshot in model.ProfileSnapshot.latest_query(
+                session, [user.id for user in username_to_user.values()]
+            )
+        }
+        snapshots = []
+        for profile, content in zip(self.profiles, contents):
+            user = username_to_user[profile.username]
+            snapshot = model.ProfileSnapshot.from_content(
+                content, user=user, fetched_at=fetched_at
+            )
+            if user_id_to_hash.get(user.id) == snapshot.content_hash:
+                continue
+            user_id_to_hash[user.id] = snapshot.content_hash
+            session.add(snapshot)
+            snapshots.append(snapshot)
+        return snapshots
+
+    save = with_txn(save_no_txn)
@@ -3,9 +3,10 @@ import logging
 import simplejson
 
 from okcupyd import helpers
+from okcupyd.messaging import fetch_messages
 from okcupyd.db import adapters
 from okcupyd.db import model, txn
-from okcupyd.util import curry
+from okcupyd.util import curry, map_concurrently
 
 
 log = logging.getLogger(__name__)
@@ -14,8 +15,16 @@ log = logging.getLogger(__name__)
 class Sync(object):
     """Sync messages from a users inbox to the okc database."""
 
-    def __init__(self, user):
+    def __init__(self, user, concurrency=4, page_size=30):
+        """
+        :param user: The :class:`~okcupyd.user.User` whose mailboxes to sync.
+        :param concurrency: The number of message threads to fetch at once.
+        :param page_size: The number of threads that are written to the
+                          database in each transaction.
+        """
         self._user = user
+        self._concurrency = concurrency
+        self._page_size = page_size
 
     def all(self):
         self.update_mailbox('outbox')
@@ -54,16 +63,40 @@ class Sync(object):
     def _sync_mailbox_until(self, mailbox, sync_until):
         threads = []
         messages = []
-        for thread in mailbox:
-            if sync_until and sync_until > thread.datetime:
-                break
-            if not thread.messages:
-                continue
-            if not thread.with_deleted_user:
-                thread, new_messages = adapters.ThreadAdapter(thread).get_thread()
-                threads.append(threads)
-                messages.extend(new_messages)
+        user_resolver = adapters.UserResolver(concurrency=self._concurrency)
+        for page in self._pages_until(mailbox, sync_until):
+            page_threads, new_messages = adapters.ThreadBatchAdapter(
+                self._fetch(page), user_resolver=user_resolver
+            ).get_threads()
+            threads.extend(page_threads)
+            messages.extend(new_messages)
         try:
             return mailbox[0].datetime, threads, messages
         except IndexError:
             pass
+
+    def _pages_until(self, mailbox, sync_until):
+        page = []
+        for thread in mailbox:
+            if sync_until and sync_until > thread.datetime:
+                break
+            page.append(thread)
+            if len(page) >= self._page_size:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def _fetch(self, threads):
+        """Load the messages and correspondent profiles of `threads`
+        concurrently and drop the ones that should not be synced.
+        """
+        for thread in threads:
+            # Every thread would otherwise load its own copy of this profile.
+            thread.user_profile = self._user.profile
+        fetch_messages(threads, concurrency=self._concurrency)
+        threads = [thread for thread in threads if thread.messages]
+        deleted = map_concurrently(lambda thread: thread.with_deleted_user,
+                                   threads, concurrency=self._concurrency)
+        return [thread for thread, with_deleted_user in zip(threads, deleted)
+                if not with_deleted_user]
@@ -0,0 +1,126 @@
+"""Bring databases that were created by older versions of okcupyd up to date
+with the current models:
+
+.. code:: python
+
+    from okcupyd.db import migrate
+
+    migrate.upgrade()
+"""
+import logging
+
+import simplejson
+from sqlalchemy import Integer, MetaData, Table, inspect
+
+from okcupyd.db import Base, get_engine
+# Imported so that every model table is registered on Base.metadata.
+from okcupyd.db import model
+
+
+log = logging.getLogger(__name__)
+
+
+def _okc_id_tables():
+    return [table for table in Base.metadata.sorted_tables
+            if 'okc_id' in table.columns]
+
+
+def _has_integer_okc_id(engine, table):
+    for column in inspect(engine).get_columns(table.name):
+        if column['name'] == 'okc_id':
+            return isinstance(column['type'], Integer)
+
+
+def _rebuild_sqlite_table(connection, table, chunk_size=1000):
+    # SQLite can not change the type of a column, so the rows are copied into
+    # a new table that then takes the place of the old one.
+    new_name = '{0}__new'.format(table.name)
+    # The tables that foreign keys refer to must be in the same metadata.
+    metadata = MetaData()
+    for other_table in Base.metadata.sorted_tables:
+        other_table.tometadata(metadata)
+    new_table = table.tometadata(metadata, name=new_name)
+    for index in list(new_table.indexes):
+        new_table.indexes.discard(index)
+    new_table.create(connection)
+    old_table = Table(table.name, MetaData(), autoload=True,
+                      autoload_with=connection)
+    rows = []
+    for row in connection.execute(old_table.select()):
+        row = dict(row)
+        row['okc_id'] = int(row['okc_id'])
+        rows.append(row)
+        if len(rows) >= chunk_size:
+            connection.execute(new_table.insert(), rows)
+            rows = []
+    if rows:
+        connection.execute(new_table.insert(), rows)
+    old_table.drop(connection)
+    connection.execute('ALTER TABLE {0} RENAME TO {1}'.format(
+        connection.dialect.identifier_preparer.quote(new_name),
+        connection.dialect.identifier_preparer.quote(table.name)
+    ))
+
+
+def _alter_postgresql_column(connection, table):
+    # The bounds must be numeric literals: 2^63 and 2^64 are double precision
+    # in postgresql, which would round away the low bits of large ids.
+    connection.execute(
+        'ALTER TABLE {0} ALTER COLUMN okc_id TYPE BIGINT USING '
+        '(CASE WHEN okc_id::numeric >= {1}::numeric '
+        'THEN okc_id::numeric - {2}::numeric '
+        'ELSE okc_id::numeric END)::bigint'.format(
+            connection.dialect.identifier_preparer.quote(table.name),
+            2**63, 2**64
+        )
+    )
+
+
+def migrate_okc_ids(engine=None):
+    """Convert okc_id columns that were stored as strings by
+    :class:`~okcupyd.db.types.StringBackedInteger` to the integers of
+    :class:`~okcupyd.db.types.UnsignedBigInteger`.
+
+    :returns: The names of the tables that were converted.
+    :raises ValueError: If `engine` is neither a SQLite nor a PostgreSQL
+                        database.
+    """
+    engine = engine or get_engine()
+    if engine.dialect.name == 'sqlite':
+        convert = _rebuild_sqlite_table
+    elif engine.dialect.name == 'postgresql':
+        convert = _alter_postgresql_column
+    else:
+        raise ValueError(
+            'okc_id columns can only be migrated on sqlite and postgresql '
+            'databases, not {0}.'.format(engine.dialect.name)
+        )
+    tables = [table for table in _okc_id_tables()
+              if table.exists(engine) and not _has_integer_okc_id(engine, table)]
+    with engine.begin() as connection:
+        for table in tables:
+            convert(connection, table)
+    log.info(simplejson.dumps({'migrated_okc_id_tables':
+                               [table.name for table in tables]}))
+    return [table.name for table in tables]
+
+
+def create_indexes(engine=None):
+    """Create the indexes of the models that do not exist yet."""
+    engine = engine or get_engine()
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not table.exists(engine):
+            continue
+        existing = set(index['name']
+                       for index in inspector.get_indexes(table.name))
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(engine)
+
+
+def upgrade(engine=None):
+    """Apply every migration in this module to `engine`."""
+    engine = engine or get_engine()
+    migrate_okc_ids(engine)
+    create_indexes(engine)
@@ -1,3 +1,4 @@
 from .message import Message
 from .message_thread import MessageThread
+from .profile_snapshot import ProfileSnapshot
 from .user import User, OKCupydUser
@@ -13,7 +13,7 @@ class Message(OKCBase):
         UniqueConstraint('message_thread_id', 'thread_index'),
     )
 
-    time_sent = Column(DateTime, nullable=True)
+    time_sent = Column(DateTime, nullable=True, index=True)
 
     message_thread_id = Column(Integer, ForeignKey("message_thread.id"),
                                nullable=False)
@@ -11,10 +11,10 @@ class MessageThread(OKCBase):
 
     __tablename__ = "message_thread"
 
-    initiator_id = Column(Integer, ForeignKey("user.id"))
+    initiator_id = Column(Integer, ForeignKey("user.id"), index=True)
     initiator = relationship("User", foreign_keys=[initiator_id])
 
-    respondent_id = Column(Integer, ForeignKey("user.id"))
+    respondent_id = Column(Integer, ForeignKey("user.id"), index=True)
     respondent = relationship("User", foreign_keys=[respondent_id])
 
     messages = relationship("Message", order_by="Message.thread_index",
@@ -0,0 +1,97 @@
+import datetime
+import hashlib
+
+import simplejson
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy import func
+from sqlalchemy.orm import relationship
+
+from okcupyd.db import Base, with_txn
+from okcupyd.db.types import JSONType
+from okcupyd.essay import Essays
+
+
+def _looking_for_content(looking_for):
+    return {'gentation': looking_for.gentation,
+            'ages': list(looking_for.ages),
+            'single': looking_for.single,
+            'near_me': looking_for.near_me,
+            'kinds': looking_for.kinds}
+
+
+class ProfileSnapshot(Base):
+    """The content of a profile at the time it was fetched. Snapshots are
+    only ever added, so the snapshots of a user form the history of their
+    profile.
+    """
+
+    __tablename__ = 'profile_snapshot'
+
+    __table_args__ = (
+        Index('ix_profile_snapshot_user_id_id', 'user_id', 'id'),
+    )
+
+    #: The names of the columns that hold the content of the profile.
+    content_columns = ('details', 'essays', 'looking_for', 'match_percentage',
+                       'enemy_percentage', 'photo_ids')
+
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    user = relationship("User", foreign_keys=[user_id])
+
+    fetched_at = Column(DateTime, nullable=False)
+    content_hash = Column(String(40), nullable=False)
+
+    details = Column(JSONType)
+    essays = Column(JSONType)
+    looking_for = Column(JSONType)
+    match_percentage = Column(Integer)
+    enemy_percentage = Column(Integer)
+    photo_ids = Column(JSONType)
+
+    @staticmethod
+    def hash_content(content):
+        return hashlib.sha1(
+            simplejson.dumps(content, sort_keys=True).encode('utf8')
+        ).hexdigest()
+
+    @staticmethod
+    def content_from_profile(profile):
+        """Read the content that is stored in a snapshot from a
+        :class:`~okcupyd.profile.Profile`. This loads the profile page and
+        photo album of `profile` if they have not been loaded yet.
+        """
+        return {
+            'details': profile.details.as_dict,
+            'essays': {name: getattr(profile.essays, name)
+                       for _, name in Essays.essay_names.values()},
+            'looking_for': _looking_for_content(profile.looking_for),
+            'match_percentage': profile.match_percentage,
+            'enemy_percentage': profile.enemy_percentage,
+            'photo_ids': [info.id for info in profile.photo_infos]
+        }
+
+    @classmethod
+    def from_content(cls, content, user=None, fetched_at=None):
+        return cls(user=user,
+                   fetched_at=fetched_at or datetime.datetime.utcnow(),
+                   content_hash=cls.hash_content(content),
+                   **content)
+
+    @classmethod
+    def latest_query(cls, session, user_ids=None):
+        """Build a query for the most recent snapshot of each user.
+
+        :param user_ids: Restrict the query to the users with these ids.
+        """
+        latest_ids = session.query(func.max(cls.id).label('id')).\
+                     group_by(cls.user_id)
+        if user_ids is not None:
+            latest_ids = latest_ids.filter(cls.user_id.in_(user_ids))
+        latest_ids = latest_ids.subquery()
+        return session.query(cls).join(latest_ids, cls.id == latest_ids.c.id)
+
+    @classmethod
+    def latest_no_txn(cls, session, user_ids=None):
+        return cls.latest_query(session, user_ids=user_ids).all()
+
+    latest = with_txn(latest_no_txn)
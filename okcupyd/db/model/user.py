@@ -13,7 +13,7 @@ class User(OKCBase):
         return cls(okc_id=profile.id, handle=profile.username, age=profile.age,
                    location=profile.location)
 
-    handle = Column(String, nullable=False)
+    handle = Column(String, nullable=False, index=True)
     age = Column(String, nullable=False)
     location = Column(String, nullable=False)
 
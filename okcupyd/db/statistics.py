@@ -0,0 +1,150 @@
+"""Compute :class:`~okcupyd.statistics.Statistics` style aggregates from the
+message threads that :class:`~okcupyd.db.mailbox.Sync` has stored in the
+database. Filters and aggregates are evaluated by the database, so no
+requests are made to okcupid.com:
+
+.. code:: python
+
+    from okcupyd.db.statistics import Statistics
+
+    statistics = Statistics(user.profile.id)
+    statistics.time_filter(min_date=last_month).response_rate
+"""
+import datetime
+
+from sqlalchemy import exists, func, or_, select
+
+from okcupyd import util
+from okcupyd.db import model, txn
+
+
+_thread = model.MessageThread.__table__
+_message = model.Message.__table__
+
+
+def _thread_messages(*columns):
+    return select(columns).where(
+        _message.c.message_thread_id == _thread.c.id
+    ).correlate(_thread)
+
+
+#: The number of messages in each thread.
+message_count = _thread_messages(func.count(_message.c.id)).as_scalar()
+
+#: The time of the most recent message in each thread.
+last_message_time = _thread_messages(
+    func.max(_message.c.time_sent)
+).as_scalar()
+
+#: The length of the text of the first message in each thread.
+first_message_length = _thread_messages(
+    func.length(_message.c.text)
+).where(_message.c.thread_index == 0).as_scalar()
+
+#: Whether or not anyone other than the initiator sent a message in each
+#: thread.
+got_response = exists(_thread_messages(_message.c.id).where(
+    _message.c.sender_id != _thread.c.initiator_id
+))
+
+
+class Statistics(object):
+    """The statistics of the stored message threads of a single user.
+
+    :param user_okc_id: The okcupid id of the user whose threads should be
+                        included.
+    :param criteria: Additional sqlalchemy criteria that every included
+                     :class:`~okcupyd.db.model.MessageThread` must meet.
+    """
+
+    def __init__(self, user_okc_id, criteria=()):
+        self._user_okc_id = user_okc_id
+        self._criteria = criteria
+        self._user_id = select([model.User.id]).where(
+            model.User.okc_id == user_okc_id
+        ).as_scalar()
+
+    def _query(self, session, *columns):
+        return session.query(*columns).select_from(_thread).filter(
+            or_(_thread.c.initiator_id == self._user_id,
+                _thread.c.respondent_id == self._user_id),
+            *self._criteria
+        )
+
+    def with_criteria(self, *criteria):
+        return type(self)(self._user_okc_id, self._criteria + criteria)
+
+    @property
+    def threads(self):
+        """
+        :returns: A list of the :class:`~okcupyd.db.model.MessageThread`
+                  objects that meet the criteria of this
+                  :class:`~.Statistics`.
+        """
+        with txn() as session:
+            threads = self._query(session, model.MessageThread).all()
+            session.expunge_all()
+            return threads
+
+    @property
+    def count(self):
+        with txn() as session:
+            return self._query(session, func.count(_thread.c.id)).scalar()
+
+    @util.cached_property
+    def has_messages(self):
+        return self.with_criteria(message_count > 0)
+
+    @util.cached_property
+    def has_response(self):
+        return self.with_criteria(got_response)
+
+    @util.cached_property
+    def no_responses(self):
+        return self.with_criteria(~got_response)
+
+    @util.cached_property
+    def initiated(self):
+        return self.with_criteria(_thread.c.initiator_id == self._user_id)
+
+    @util.cached_property
+    def received(self):
+        return self.with_criteria(_thread.c.initiator_id != self._user_id)
+
+    def time_filter(self, min_date=None, max_date=None):
+        """Restrict the threads to those whose most recent message was sent
+        between `min_date` and `max_date`. Both bounds are inclusive.
+        """
+        criteria = []
+        if min_date:
+            criteria.append(last_message_time >= min_date)
+        if max_date:
+            if not isinstance(max_date, datetime.datetime):
+                max_date = datetime.datetime.combine(max_date,
+                                                     datetime.time.max)
+            criteria.append(last_message_time <= max_date)
+        return self.with_criteria(*criteria)
+
+    def _average(self, column):
+        with txn() as session:
+            return self._query(session, func.avg(column)).scalar()
+
+    @property
+    def response_rate(self):
+        return float(self.has_response.count)/self.count
+
+    @property
+    def average_first_message_length(self):
+        return self._average(first_message_length)
+
+    @property
+    def average_conversation_length(self):
+        return self._average(message_count)
+
+    @property
+    def portion_initiated(self):
+        return float(self.initiated.count)/self.count
+
+    @property
+    def portion_received(self):
+        return 1 - self.portion_initiated
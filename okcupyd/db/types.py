@@ -1,4 +1,4 @@
-from sqlalchemy.types import TypeDecorator, VARCHAR
+from sqlalchemy.types import BigInteger, TypeDecorator, VARCHAR
 import simplejson
 
 
@@ -25,4 +25,24 @@ class StringBackedInteger(TypeDecorator):
         return str(value)
 
     def process_result_value(self, value, dialect):
-        return int(value)
\ No newline at end of file
+        return int(value)
+
+
+class UnsignedBigInteger(TypeDecorator):
+    """Store unsigned 64 bit integers, which okcupid.com uses for ids, in a
+    signed 64 bit integer column by wrapping the values that do not fit.
+    """
+
+    impl = BigInteger
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return value
+        value = int(value)
+        return value - 2**64 if value >= 2**63 else value
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return value
+        value = int(value)
+        return value + 2**64 if value < 0 else value
@@ -5,19 +5,38 @@ from okcupyd.db import model, with_txn
 
 
 def have_messaged_by_username_no_txn(session, username_one, username_two):
+    return _threads_between_usernames(
+        session.query(model.MessageThread), username_one, username_two
+    ).exists()
+
+
+def _threads_between_usernames(query, username_one, username_two):
     user_one = aliased(model.User)
     user_two = aliased(model.User)
-    return session.query(model.MessageThread).\
+    return query.\
         join(user_one, user_one.id == model.MessageThread.initiator_id).\
         join(user_two, user_two.id == model.MessageThread.respondent_id).\
         filter(or_(
             and_(user_one.handle == username_one, user_two.handle == username_two),
             and_(user_one.handle == username_two, user_two.handle == username_one),
-        )).exists()
+        ))
 
 
 @with_txn
 def have_messaged_by_username(session, username_one, username_two):
     return session.query(
         have_messaged_by_username_no_txn(session, username_one, username_two)
-    ).scalar()
\ No newline at end of file
+    ).scalar()
+
+
+def thread_okc_id_by_username_no_txn(session, username_one, username_two):
+    row = _threads_between_usernames(
+        session.query(model.MessageThread.okc_id), username_one, username_two
+    ).first()
+    if row is not None:
+        return row[0]
+
+
+@with_txn
+def thread_okc_id_by_username(session, username_one, username_two):
+    return thread_okc_id_by_username_no_txn(session, username_one, username_two)
@@ -69,10 +69,14 @@ class Detail(object):
             value = value.lower()
         return self.updater(self.id_name, value)
 
+    def present(self, id_to_display_name_value):
+        return self.presenter(id_to_display_name_value.get(self.id_name,
+                                                            u'\u2014'))
+
     def __get__(self, details, klass):
         if details is None:
             return self
-        return self.presenter(details.id_to_display_name_value.get(self.id_name, u'\u2014'))
+        return self.present(details.id_to_display_name_value)
 
     def __set__(self, details, value):
         details.update(self.update(value))
@@ -89,8 +93,18 @@ class Details(object):
 
     @classmethod
     def name_detail_pairs(cls):
+        """
+        :returns: A list of (name, :class:`.Detail`) pairs, sorted by name.
+                  The list is built once per class, so details that are added
+                  to a class after it is first built are not included.
+        """
+        try:
+            return cls.__dict__['_name_detail_pairs']
+        except KeyError:
+            pass
         is_detail = lambda x: isinstance(x, Detail)
-        return inspect.getmembers(cls, is_detail)
+        cls._name_detail_pairs = inspect.getmembers(cls, is_detail)
+        return cls._name_detail_pairs
 
     def __init__(self, profile):
         self.profile = profile
@@ -243,8 +257,9 @@ class Details(object):
 
     @property
     def as_dict(self):
-        return {name: getattr(self, name)
-                for name, _ in self.name_detail_pairs()}
+        id_to_display_name_value = self.id_to_display_name_value
+        return {name: detail.present(id_to_display_name_value)
+                for name, detail in self.name_detail_pairs()}
 
     def convert_and_update(self, data):
         klass = type(self)
@@ -257,7 +272,7 @@ class Details(object):
     def update(self, data):
         log.debug(data)
         response = self.profile.authcode_post('profileedit2', data=data)
-        self.profile.refresh()
+        self.profile.refresh(groups=('page',))
         self.refresh()
         return response
 
@@ -393,16 +408,17 @@ class Details(object):
             return data
 
 
+is_declarative_detail = lambda x: (isinstance(x, type) and
+                                   issubclass(x, DeclarativeDetail))
+for id_name, declarative_detail in inspect.getmembers(
+    Details, is_declarative_detail
+):
+    detail = Detail(presenter=declarative_detail.presenter,
+                    updater=declarative_detail.updater,
+                    id_name=id_name)
+    setattr(Details, id_name, detail)
+
+
 for id_name, detail in Details.name_detail_pairs():
     if detail.id_name is None:
         detail.id_name = id_name
-
-    is_declarative_detail = lambda x: (isinstance(x, type) and
-                                  issubclass(x, DeclarativeDetail))
-    for id_name, declarative_detail in inspect.getmembers(
-        Details, is_declarative_detail
-    ):
-        detail = Detail(presenter=declarative_detail.presenter,
-                        updater=declarative_detail.updater,
-                        id_name=id_name)
-        setattr(Details, id_name, detail)
@@ -72,7 +72,7 @@ class Essays(object):
         self.refresh()
 
     def refresh(self):
-        self._profile.refresh()
+        self._profile.refresh(groups=('page',))
         util.cached_property.bust_caches(self)
 
     def __iter__(self):
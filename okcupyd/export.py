@@ -0,0 +1,172 @@
+"""Stream search results and other collections of profiles to disk.
+
+Records are written as they are fetched, so the memory used by an export
+does not grow with the number of exported records:
+
+.. code:: python
+
+    from okcupyd import export
+
+    export.export_search('results.jsonl', gentation='everybody',
+                         fields=('username', 'userinfo.age', 'match'))
+"""
+import itertools
+import logging
+
+import simplejson
+import six
+
+from . import util
+from .json_search import SearchRecordFetchable
+
+
+log = logging.getLogger(__name__)
+
+
+_primitive_types = six.string_types + six.integer_types + (
+    float, bool, type(None), list, tuple, dict
+)
+
+
+def get_field(record, field):
+    """Get the value at the dotted path `field` in `record`, or None if
+    any part of the path is missing.
+    """
+    value = record
+    for part in field.split('.'):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def project(record, fields=None):
+    """Restrict `record` to the dotted paths in `fields`."""
+    if fields is None:
+        return record
+    return {field: get_field(record, field) for field in fields}
+
+
+def profile_record(profile):
+    """Build a record from a :class:`~okcupyd.profile.Profile` out of the
+    values it has already loaded. No requests are made to okcupid.com.
+    """
+    record = {'username': profile.username}
+    for name, _ in util.cached_property.get_cached_properties(profile):
+        value = profile.__dict__.get(name)
+        if name in profile.__dict__ and isinstance(value, _primitive_types):
+            record[name] = value
+    return record
+
+
+def as_record(item):
+    return item if isinstance(item, dict) else profile_record(item)
+
+
+class JSONLinesWriter(object):
+    """Write each record as a json object on its own line."""
+
+    def __init__(self, file_object):
+        self._file = file_object
+
+    def write(self, record):
+        self._file.write(simplejson.dumps(record))
+        self._file.write('\n')
+
+    def close(self):
+        self._file.flush()
+
+
+class ColumnarChunkWriter(object):
+    """Buffer records into chunks of `chunk_size` rows and write each chunk as
+    a json object on its own line that maps every field to the list of its
+    values for the rows in the chunk.
+
+    If no `fields` are given, the columns of each chunk are the keys of its
+    own records, so different chunks of one file may have different columns.
+    """
+
+    def __init__(self, file_object, chunk_size=1000, fields=None):
+        self._file = file_object
+        self._chunk_size = chunk_size
+        self._fields = fields
+        self._rows = []
+
+    def write(self, record):
+        self._rows.append(record)
+        if len(self._rows) >= self._chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        fields = self._fields
+        if fields is None:
+            fields = sorted(set(key for row in self._rows for key in row))
+        self._file.write(simplejson.dumps({
+            'count': len(self._rows),
+            'columns': {field: [row.get(field) for row in self._rows]
+                        for field in fields}
+        }))
+        self._file.write('\n')
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        self._file.flush()
+
+
+formats = {
+    'jsonl': lambda file_object, chunk_size, fields: JSONLinesWriter(
+        file_object
+    ),
+    'columnar': ColumnarChunkWriter
+}
+
+
+def export(items, destination, format='jsonl', fields=None, chunk_size=1000):
+    """Write `items` to `destination` incrementally.
+
+    :param items: An iterable of raw search records or
+                  :class:`~okcupyd.profile.Profile` instances. Use
+                  :meth:`~okcupyd.util.fetchable.Fetchable.stream` rather than
+                  a :class:`~okcupyd.util.fetchable.Fetchable` itself to avoid
+                  keeping every item in memory.
+    :param destination: A file path or a file like object.
+    :param format: Either 'jsonl' or 'columnar'.
+    :param fields: Dotted paths of the fields to keep. All fields are kept if
+                   this is None.
+    :param chunk_size: The number of rows per chunk in the 'columnar' format.
+    :returns: The number of records that were written.
+    """
+    if isinstance(destination, six.string_types):
+        with open(destination, 'w') as file_object:
+            return export(items, file_object, format=format, fields=fields,
+                          chunk_size=chunk_size)
+    writer = formats[format](destination, chunk_size, fields)
+    written = 0
+    for item in items:
+        writer.write(project(as_record(item), fields))
+        written += 1
+    writer.close()
+    log.info(simplejson.dumps({'exported_records': written,
+                               'format': format}))
+    return written
+
+
+def export_search(destination, session=None, format='jsonl', fields=None,
+                  chunk_size=1000, limit=None, page_size=18, **kwargs):
+    """Run a search and write the raw records it returns to `destination`.
+    See :func:`~.export` for a description of the arguments shared with it.
+
+    :param limit: The maximum number of records to export.
+    :param page_size: The number of records to request from okcupid.com at
+                      a time.
+    :param kwargs: Search parameters accepted by
+                   :func:`~okcupyd.json_search.SearchFetchable`.
+    """
+    records = SearchRecordFetchable(session, **kwargs).stream(count=page_size)
+    if limit is not None:
+        records = itertools.islice(records, limit)
+    return export(records, destination, format=format, fields=fields,
+                  chunk_size=chunk_size)
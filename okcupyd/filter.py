@@ -1,3 +1,4 @@
+import copy
 import inspect
 import itertools
 
@@ -118,23 +119,16 @@ class Filters(object):
         return "{0}({1})".format(type(self).__name__,
                                  repr(self.builder_to_keys.keys()))
 
-    def filters(self, **kwargs):
-        builders = [
-            builder for builder in self.builders
-            if self._handle_decide(builder, kwargs)
-        ]
-        return [
-            builder.transform(
-                *[kwargs.get(key) for key in builder.keys]
-            )
-            for builder in builders
-        ]
+    @util.cached_property
+    def plan(self):
+        """A :class:`~.FilterPlan` compiled from the builders that are
+        currently registered with this :class:`~.Filters` instance. It is
+        rebuilt automatically when a new builder is registered.
+        """
+        return FilterPlan(self.builders)
 
-    def _handle_decide(self, builder, kwargs):
-        if len(inspect.getargspec(builder.decide).args) == 2:
-            return builder.decide(kwargs)
-        else:
-            return builder.decide(builder.transform, kwargs, builder.keys)
+    def filters(self, **kwargs):
+        return list(self.plan.legacy_values(kwargs))
 
     def _validate_incoming(self, kwargs):
         if self._strict and not self.keys.issuperset(kwargs.keys()):
@@ -146,22 +140,15 @@ class Filters(object):
 
     def build(self, **kwargs):
         self._validate_incoming(kwargs)
-        return {
-            builder.output_key: builder.transform_from_kwargs(kwargs)
-            for builder in self.builders
-            if builder.decide(kwargs)
-        }
+        return self.plan.build(kwargs)
 
     def legacy_build(self, **kwargs):
         self._validate_incoming(kwargs)
-        return {
-            u'filter{0}'.format(filter_number): filter_string
-            for filter_number, filter_string
-            in enumerate(self.filters(**kwargs), 1)
-        }
+        return self.plan.legacy_build(kwargs)
 
     def register_builder(self, filter_object):
         self.builders.append(filter_object)
+        type(self).plan.bust_self(self)
         self.keys.update(filter_object.keys)
         self._update_docs_dict(
             self._key_to_type,
@@ -231,6 +218,147 @@ class Filters(object):
             docs_dict.update(incoming)
 
 
+_key_dependent_deciders = (all_not_none_decider, Filters.any_decider,
+                           Filters.all_decider, Filters.any_not_none_decider)
+
+
+class _CompiledBuilder(object):
+
+    def __init__(self, index, builder):
+        self.index = index
+        self.builder = builder
+        self.keys = tuple(builder.keys)
+        self.output_key = builder.output_key
+        self.transform = builder.transform
+        if len(inspect.getargspec(builder.decide).args) == 2:
+            self._decide = builder.decide
+            # The default decide of the filter metaclass is bound to the
+            # builder itself and only ever looks at the builder's keys.
+            self.key_dependent = getattr(builder.decide, '__self__',
+                                         None) is builder
+        else:
+            self._decide = lambda kwargs: builder.decide(
+                builder.transform, kwargs, builder.keys
+            )
+            self.key_dependent = builder.decide in _key_dependent_deciders
+
+    def decide(self, kwargs):
+        return self._decide(kwargs)
+
+    def transform_from_kwargs(self, kwargs):
+        return self.transform(*[kwargs.get(key) for key in self.keys])
+
+
+class FilterPlan(object):
+    """Precomputed dispatch from incoming keys to the builders of a
+    :class:`~.Filters` instance.
+
+    Only builders that accept at least one of the incoming keys (and builders
+    whose deciders can not be analyzed) are consulted for a given set of
+    kwargs. Built parameter dictionaries are cached by the values of the
+    accepted keys, so building the same search parameters repeatedly does not
+    rerun any of the transforms.
+    """
+
+    def __init__(self, builders, max_cache_size=256):
+        self.builders = [_CompiledBuilder(index, builder)
+                         for index, builder in enumerate(builders)]
+        self.keys = frozenset(key for builder in self.builders
+                              for key in builder.keys)
+        self._key_to_builders = {}
+        self._undispatchable = []
+        for builder in self.builders:
+            if builder.key_dependent:
+                for key in builder.keys:
+                    self._key_to_builders.setdefault(key, []).append(builder)
+            else:
+                self._undispatchable.append(builder)
+        self._max_cache_size = max_cache_size
+        self._build_cache = {}
+        self._legacy_cache = {}
+
+    def candidates(self, kwargs):
+        """
+        :returns: The builders that could possibly be triggered by `kwargs`
+                  in registration order.
+        """
+        candidates = set(self._undispatchable)
+        for key in kwargs:
+            candidates.update(self._key_to_builders.get(key, ()))
+        return sorted(candidates, key=lambda builder: builder.index)
+
+    def deciding_builders(self, kwargs):
+        return [builder for builder in self.candidates(kwargs)
+                if builder.decide(kwargs)]
+
+    def legacy_values(self, kwargs):
+        for builder in self.deciding_builders(kwargs):
+            yield builder.transform_from_kwargs(kwargs)
+
+    def build(self, kwargs):
+        return self._cached(self._build_cache, self._build, kwargs)
+
+    def legacy_build(self, kwargs):
+        return self._cached(self._legacy_cache, self._legacy_build, kwargs)
+
+    def _build(self, kwargs):
+        return {
+            builder.output_key: builder.transform_from_kwargs(kwargs)
+            for builder in self.deciding_builders(kwargs)
+        }
+
+    def _legacy_build(self, kwargs):
+        return {
+            u'filter{0}'.format(filter_number): filter_string
+            for filter_number, filter_string
+            in enumerate(self.legacy_values(kwargs), 1)
+        }
+
+    def _cached(self, cache, function, kwargs):
+        cache_key = self.cache_key(kwargs)
+        if cache_key is None:
+            return function(kwargs)
+        if cache_key not in cache:
+            if len(cache) >= self._max_cache_size:
+                cache.clear()
+            cache[cache_key] = function(kwargs)
+        return copy.deepcopy(cache[cache_key])
+
+    def cache_key(self, kwargs):
+        """
+        :returns: A hashable representation of the values in `kwargs` that
+                  are relevant to this plan or None if one can not be built.
+        """
+        try:
+            cache_key = frozenset(
+                (key, _freeze(value)) for key, value in kwargs.items()
+                if key in self.keys
+            )
+            hash(cache_key)
+        except TypeError:
+            return None
+        return cache_key
+
+    def clear_cache(self):
+        self._build_cache.clear()
+        self._legacy_cache.clear()
+
+
+def _freeze(value):
+    # The type is part of the frozen value because values that compare equal,
+    # like True and 1 or a list and a tuple, can build different filters.
+    if isinstance(value, (list, tuple)):
+        frozen = tuple(_freeze(item) for item in value)
+    elif isinstance(value, (set, frozenset)):
+        frozen = frozenset(_freeze(item) for item in value)
+    elif isinstance(value, dict):
+        frozen = frozenset((_freeze(key), _freeze(item))
+                           for key, item in value.items())
+    else:
+        frozen = value
+    return type(value), frozen
+
+
 def gentation_filter(gentation):
     return u'0,{0}'.format(
         magicnumbers.gentation_to_number[gentation.strip().lower()]
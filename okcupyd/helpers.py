@@ -3,10 +3,13 @@ from collections import namedtuple
 from datetime import datetime, timedelta
 from json import loads
 from lxml import html
-from re import search
 import logging
+import re
+import threading
 
+import requests
 import simplejson
+import six
 
 from .xpath import xpb
 from . import util
@@ -25,11 +28,22 @@ CHAR_REPLACE = {
     u'\u2019': "'",
 }
 
+# A unicode.translate table for CHAR_REPLACE. Narrow python 2 builds store
+# characters outside of the basic multilingual plane as two code units, which
+# translate can not replace, so those are replaced separately.
+_char_replace_table = {ord(character): six.text_type(replacement)
+                       for character, replacement in CHAR_REPLACE.items()
+                       if len(character) == 1}
+_char_replace_pairs = [(character, replacement)
+                       for character, replacement in CHAR_REPLACE.items()
+                       if len(character) != 1]
+
 
 log = logging.getLogger(__name__)
 
 
 MessageInfo = namedtuple('MessageInfo', ('thread_id', 'message_id'))
+SendResult = namedtuple('SendResult', ('username', 'message_info', 'error'))
 
 
 class Messager(object):
@@ -37,6 +51,8 @@ class Messager(object):
 
     def __init__(self, session):
         self._session = session
+        self._authcode = None
+        self._authcode_lock = threading.Lock()
 
     def _get_authcode(self, username):
         response = self._session.okc_get('profile/{0}'.format(username))
@@ -57,21 +73,134 @@ class Messager(object):
 
     def send(self, username, message, authcode=None, thread_id=None):
         authcode = authcode or self._get_authcode(username)
+        return self._message_info(
+            self._request_send(username, message, authcode, thread_id)
+        )
+
+    def _request_send(self, username, message, authcode, thread_id=None):
         params = self.message_request_parameters(
             username, message, thread_id or 0, authcode
         )
-        response = self._session.okc_get('mailbox', params=params)
+        return self._session.okc_get('mailbox', params=params)
+
+    @staticmethod
+    def _message_info(response):
         response_dict = response.json()
         log.info(simplejson.dumps({'message_send_response': response_dict}))
         return MessageInfo(response_dict.get('threadid'), response_dict['msgid'])
 
+    def _shared_authcode(self, username, stale=None):
+        # The AUTHCODE embedded in profile pages belongs to the session rather
+        # than to the profile being viewed, so one is enough for many sends.
+        with self._authcode_lock:
+            if self._authcode is None or self._authcode == stale:
+                self._authcode = self._get_authcode(username)
+            return self._authcode
+
+    @staticmethod
+    def _log_send_failure(username, attempt, exc):
+        log.warning(simplejson.dumps({
+            'message_send_failure': username,
+            'attempt': attempt,
+            'error': repr(exc)
+        }))
+
+    def _send_with_retries(self, username, message, retries, authcode=None):
+        # Sending a message is not idempotent, so only the failures that are
+        # known to happen before okcupid accepts a message are retried.
+        error = None
+        for attempt in range(retries + 1):
+            try:
+                if attempt or authcode is None:
+                    authcode = self._shared_authcode(username, stale=authcode)
+            except Exception as exc:
+                error = exc
+                self._log_send_failure(username, attempt, exc)
+                continue
+            try:
+                response = self._request_send(username, message, authcode)
+            except (requests.ConnectionError, requests.HTTPError) as exc:
+                error = exc
+                self._log_send_failure(username, attempt, exc)
+                continue
+            except Exception as exc:
+                self._log_send_failure(username, attempt, exc)
+                return SendResult(username, None, exc)
+            try:
+                return SendResult(username, self._message_info(response), None)
+            except Exception as exc:
+                # okcupid may already have accepted the message.
+                self._log_send_failure(username, attempt, exc)
+                return SendResult(username, None, exc)
+        return SendResult(username, None, error)
+
+    def send_many(self, usernames, message, concurrency=4, retries=1,
+                  authcode=None):
+        """Send a message to each of `usernames`.
+
+        A single authcode is fetched and reused for every send; it is only
+        fetched again when a send using it fails. Only failures that happen
+        before okcupid accepts a message, such as connection errors and error
+        statuses, are retried, so that no user is messaged twice. Sends are
+        issued from `concurrency` threads, which are still spaced out by the
+        session's rate limiter.
+
+        :param usernames: The usernames of the recipients.
+        :param message: The body of the message, or a function that takes a
+                        username and returns the body of the message to send
+                        to that user.
+        :param concurrency: The maximum number of sends in flight at once.
+        :param retries: The number of times a send that failed before
+                        reaching okcupid is retried.
+        :param authcode: An authcode to use for the first attempt of each
+                         send of this call instead of the shared one.
+        :returns: A list of :class:`~.SendResult` in the order of `usernames`.
+                  The `message_info` of a result is None and its `error` is
+                  the last exception raised if every attempt to send to that
+                  user failed.
+        """
+        get_message = message if callable(message) else lambda _: message
+        send = lambda username: self._send_with_retries(
+            username, get_message(username), retries, authcode
+        )
+        return util.map_concurrently(send, usernames, concurrency=concurrency)
+
+
+_js_variable = re.compile(r'var (\w+) = "(.*?)";')
+
+
+def get_js_variables(html_response):
+    """
+    :returns: A dict from the name to the value of every javascript string
+              variable that is declared in the script elements of
+              `html_response`. Objects that look up several variables of
+              one tree keep this rather than scanning the scripts again.
+    """
+    variables = {}
+    for script_element in xpb.script.apply_(html_response):
+        for name, value in _js_variable.findall(
+            u''.join(script_element.itertext())
+        ):
+            variables.setdefault(name, value)
+    return variables
+
+
+def find_js_variable(js_variables, variable_name):
+    """Get `variable_name` from the result of :func:`~.get_js_variables`.
+
+    :raises AttributeError: if no such variable was declared.
+    """
+    try:
+        return js_variables[variable_name]
+    except KeyError:
+        raise AttributeError(
+            'No javascript variable named {0}'.format(variable_name)
+        )
+
 
 @util.curry
 def get_js_variable(html_response, variable_name):
-    script_elements = xpb.script.apply_(html_response)
-    html_response = u'\n'.join(script_element.text_content()
-                               for script_element in script_elements)
-    return search('var {0} = "(.*?)";'.format(variable_name), html_response).group(1)
+    return find_js_variable(get_js_variables(html_response), variable_name)
 
 
 get_authcode = get_js_variable(variable_name='AUTHCODE')
@@ -98,26 +227,50 @@ def parse_fancydate(fancydate_text):
     return datetime.fromtimestamp(float(timestamp))
 
 
+_date_updated_format = re.compile(
+    r'^(?:(?P<slashed_date>\d{1,2}/\d{1,2}/\d{2})$|'
+    r'(?P<abbreviated_date>[a-z]{3} \d{1,2}(?:,? \d{4})?)$|'
+    r'(?P<time>\d{1,2}:\d{2}[ap]m)$|'
+    r'(?P<day_of_the_week>(?:mon|tues|wednes|thurs|fri|satur|sun)day)$|'
+    r'(?P<contextual_date>.*(?:yesterday|now)))',
+    re.IGNORECASE
+)
+
+
 def parse_date_updated(date_updated_text):
+    match = _date_updated_format.match(date_updated_text)
+    parsers = _date_updated_parsers
+    if match:
+        # Try the parser for the recognized format first, so that the common
+        # formats do not go through the failing parsers before them.
+        parsers = ((_format_to_parser[match.lastgroup],) +
+                   _date_updated_parsers)
     recognized = False
-    for function in (parse_slashed_date, parse_abbreviated_date,
-                     parse_time, parse_day_of_the_week, parse_contextual_date):
+    for function in parsers:
         parsed_time = function(date_updated_text)
         if parsed_time is not None:
             recognized = True
             break
     else:
         parsed_time = datetime.today()
-    log_function = log.info if recognized else log.error
-    log_function(simplejson.dumps({
-        "matcher_function_name": function.__name__,
-        "incoming_date": date_updated_text,
-        "outgoing_date": parsed_time.strftime("%Y.%m.%d %H:%M"),
-        "recognized": recognized
-    }))
+    log_level = logging.INFO if recognized else logging.ERROR
+    if log.isEnabledFor(log_level):
+        log.log(log_level, simplejson.dumps({
+            "matcher_function_name": function.__name__,
+            "incoming_date": date_updated_text,
+            "outgoing_date": parsed_time.strftime("%Y.%m.%d %H:%M"),
+            "recognized": recognized
+        }))
     return parsed_time
 
 
+@util.lru_cache(max_size=1024)
+def _strptime(date_string, date_format):
+    # Only the parsing of a timestamp is cached. Parsers that resolve
+    # timestamps relative to the current time do so on every call.
+    return datetime.strptime(date_string, date_format)
+
+
 def parse_contextual_date(date_updated_text):
     if 'yesterday' in date_updated_text.lower():
         return datetime.now() - timedelta(days=1)
@@ -127,7 +280,7 @@ def parse_contextual_date(date_updated_text):
 
 def parse_slashed_date(date_updated_text):
     try:
-        return datetime.strptime(date_updated_text, '%m/%d/%y')
+        return _strptime(date_updated_text, '%m/%d/%y')
     except:
         pass
 
@@ -136,16 +289,16 @@ def parse_abbreviated_date(date_updated_text):
     try:
         # Parse year if present in date_text; otherwise, use current year
         if date_text[-4].isdigit():
-            return datetime.strptime(date_text, '%b %d %Y')
+            return _strptime(date_text, '%b %d %Y')
         else:
-            parsed_time = datetime.strptime(date_text, '%b %d')
+            parsed_time = _strptime(date_text, '%b %d')
             return parsed_time.replace(year=datetime.now().year)
     except:
         pass
 
 def parse_time(date_updated_text):
     try:
-        time = datetime.strptime(date_updated_text, '%I:%M%p')
+        time = _strptime(date_updated_text, '%I:%M%p')
     except:
         pass
     else:
@@ -158,14 +311,18 @@ def parse_time(date_updated_text):
 
 
 def parse_day_of_the_week(date_updated_text):
-    try:
-        datetime.strptime(date_updated_text, '%A')
-    except:
-        pass
-    else:
+    if date_updated_text.lower() in weekday_to_ordinal:
         return date_from_weekday(date_updated_text)
 
 
+_date_updated_parsers = (parse_slashed_date, parse_abbreviated_date,
+                         parse_time, parse_day_of_the_week,
+                         parse_contextual_date)
+
+_format_to_parser = {function.__name__[len('parse_'):]: function
+                     for function in _date_updated_parsers}
+
+
 def date_from_weekday(weekday):
     today = datetime.now()
     incoming_weekday_ordinal = weekday_to_ordinal[weekday.lower()]
@@ -298,6 +455,11 @@ def replace_chars(astring):
     ----------
     str
     """
+    if isinstance(astring, six.text_type):
+        astring = astring.translate(_char_replace_table)
+        for k, v in _char_replace_pairs:
+            astring = astring.replace(k, v)
+        return astring
     for k, v in CHAR_REPLACE.items():
         astring = astring.replace(k, v)
     return astring
@@ -40,6 +40,22 @@ def SearchFetchable(session=None, **kwargs):
     )
 
 
+def SearchRecordFetchable(session=None, **kwargs):
+    """Search okcupid.com with the same parameters that are accepted by
+    :func:`~.SearchFetchable`, but provide the raw profile records returned
+    by okcupid instead of :class:`~okcupyd.profile.Profile` instances.
+
+    :returns: A :class:`~okcupyd.util.fetchable.Fetchable` of dicts.
+    """
+    session = session or Session.login()
+    return util.Fetchable(
+        SearchManager(
+            SearchJSONFetcher(session, **kwargs),
+            RecordBuilder()
+        )
+    )
+
+
 class SearchManager(object):
 
     def __init__(self, search_fetchable, profile_builder):
@@ -116,10 +132,8 @@ class SearchJSONFetcher(object):
         return search_json
 
 
-class ProfileBuilder(object):
-
-    def __init__(self, session):
-        self._session = session
+class RecordBuilder(object):
+    """Yield the raw profile records contained in a search response."""
 
     def __call__(self, response_dictionary):
         try:
@@ -133,7 +147,19 @@ class ProfileBuilder(object):
             ))
         else:
             for profile_info in profile_infos:
-                yield Profile(self._session, profile_info["username"])
+                yield profile_info
+
+
+class ProfileBuilder(RecordBuilder):
+
+    def __init__(self, session):
+        self._session = session
+
+    def __call__(self, response_dictionary):
+        for profile_info in super(ProfileBuilder, self).__call__(
+            response_dictionary
+        ):
+            yield Profile(self._session, profile_info["username"])
 
 
 class GentationFilter(search_filters.filter_class):
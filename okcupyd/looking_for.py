@@ -154,7 +154,7 @@ class LookingFor(object):
         log.info(simplejson.dumps({'looking_for_update': data}))
         util.cached_property.bust_caches(self)
         response = self._profile.authcode_post('profileedit2', data=data)
-        self._profile.refresh(reload=False)
+        self._profile.refresh(reload=False, groups=('page',))
         return response.content
 
     @staticmethod
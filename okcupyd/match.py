@@ -0,0 +1,283 @@
+"""Approximate match and enemy percentages from cached question answers,
+without making any requests to okcupid.com.
+
+The percentages are computed the way okcupid.com describes its own
+algorithm: each user's satisfaction is the importance weighted portion of
+the questions that both users answered to which the other user gave an
+acceptable answer, and the match percentage is the geometric mean of the two
+satisfactions less a margin of error of one over the number of questions in
+common.
+
+.. code:: python
+
+    from okcupyd import match
+
+    scorer = match.MatchScorer(
+        match.answers_from_user_questions(user.questions)
+    )
+    ranking = scorer.rank({username: answers
+                           for username, answers in cached_answers.items()})
+"""
+import collections
+import logging
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+import simplejson
+
+from .question import Questions, default_question_catalog
+
+
+log = logging.getLogger(__name__)
+
+
+#: The weight given to each importance, keyed by the numbers in
+#: :attr:`~okcupyd.question.Questions.importance_name_to_number`.
+importance_weights = {
+    Questions.importance_name_to_number['mandatory']: 250,
+    Questions.importance_name_to_number['very_important']: 50,
+    Questions.importance_name_to_number['somewhat_important']: 10,
+    Questions.importance_name_to_number['little_important']: 1,
+    Questions.importance_name_to_number['not_important']: 0
+}
+
+#: The importance assumed for answers whose importance is not visible.
+default_importance = Questions.importance_name_to_number['somewhat_important']
+
+#: The answer that a user gave to a question. `acceptable_ids` are the ids of
+#: the answers the user would accept from someone else and `importance` is
+#: one of the values of
+#: :attr:`~okcupyd.question.Questions.importance_name_to_number`.
+Answer = collections.namedtuple('Answer',
+                                ['answer_id', 'acceptable_ids', 'importance'])
+
+
+def answers_from_user_questions(questions):
+    """Build the answers of the logged in user.
+
+    :param questions: The :class:`~okcupyd.question.Questions` of the logged
+                      in user.
+    :returns: A dict from question id to :data:`~.Answer`.
+    """
+    answers = {}
+    for name, fetchable in questions.importance_name_to_fetchable.items():
+        importance = Questions.importance_name_to_number[name]
+        for user_question in fetchable:
+            answers[user_question.id] = Answer(
+                user_question.answer_id,
+                tuple(option.id for option in user_question.answer_options
+                      if option.is_match),
+                importance
+            )
+    return answers
+
+
+def answers_from_questions(questions, user_answers, catalog=None,
+                           importance=default_importance):
+    """Build the answers of another user from the
+    :class:`~okcupyd.question.Question` instances of their profile.
+
+    Answer ids are looked up by answer text in `catalog`, so only questions
+    whose answer options have been cataloged are included. okcupid.com does
+    not show the acceptable answers or importances of other users, only
+    whether the answer of the logged in user is acceptable to them, so the
+    acceptable ids include at most the answer of the logged in user and every
+    answer is given `importance`.
+
+    :param questions: An iterable of :class:`~okcupyd.question.Question`.
+    :param user_answers: The answers of the logged in user, as returned by
+                         :func:`~.answers_from_user_questions`.
+    :param catalog: The question catalog to look answer ids up in. Defaults
+                    to :func:`~okcupyd.question.default_question_catalog`.
+    :returns: A dict from question id to :data:`~.Answer`.
+    """
+    catalog = catalog if catalog is not None else default_question_catalog()
+    answers = {}
+    for question in questions:
+        user_answer = user_answers.get(question.id)
+        entry = catalog.get(question.id)
+        if not question.answered or user_answer is None or \
+           entry is None or entry.options is None:
+            continue
+        answer_ids = [answer_id for answer_id, text in entry.options
+                      if text == question.their_answer]
+        if not answer_ids:
+            continue
+        answers[question.id] = Answer(
+            answer_ids[0],
+            (user_answer.answer_id,) if question.my_answer_matches else (),
+            importance
+        )
+    return answers
+
+
+class MatchScorer(object):
+    """Score many users against the logged in user at once. Answers are
+    encoded as arrays with a column for every question the logged in user
+    answered, and the acceptable answers of each question as a bitmask over
+    answer ids, so scoring is a handful of numpy operations over every
+    candidate.
+    """
+
+    def __init__(self, user_answers, margin_of_error=True):
+        """
+        :param user_answers: A dict from question id to :data:`~.Answer` for
+                             the logged in user.
+        :param margin_of_error: Subtract one over the number of questions in
+                                common from the percentages, as okcupid.com
+                                does.
+        """
+        if numpy is None:
+            raise ImportError('numpy is required for MatchScorer.')
+        self.user_answers = user_answers
+        self.margin_of_error = margin_of_error
+        #: The ids of the questions that correspond to each column.
+        self.question_ids = sorted(user_answers)
+        self._columns = {question_id: column
+                         for column, question_id in
+                         enumerate(self.question_ids)}
+        self._answer, self._acceptable, self._weight = self._encode(
+            [user_answers]
+        )
+
+    def _encode(self, answers_list):
+        shape = (len(answers_list), len(self.question_ids))
+        answer = numpy.zeros(shape, dtype=numpy.int64)
+        acceptable = numpy.zeros(shape, dtype=numpy.int64)
+        weight = numpy.zeros(shape, dtype=numpy.float64)
+        for row, answers in enumerate(answers_list):
+            for question_id, (answer_id, acceptable_ids, importance) in \
+                answers.items():
+                column = self._columns.get(question_id)
+                if column is None or not answer_id:
+                    continue
+                answer[row, column] = answer_id
+                acceptable[row, column] = sum(1 << acceptable_id
+                                              for acceptable_id in
+                                              set(acceptable_ids))
+                weight[row, column] = importance_weights.get(importance, 0)
+        return answer, acceptable, weight
+
+    def satisfaction(self, answers_list):
+        """
+        :param answers_list: A list with a dict from question id to
+                             :data:`~.Answer` for each candidate.
+        :returns: Arrays with the satisfaction of the logged in user with each
+                  candidate, the satisfaction of each candidate with the
+                  logged in user and the number of questions they have in
+                  common. Satisfactions are NaN where no weighted question is
+                  in common.
+        """
+        answer, acceptable, weight = self._encode(answers_list)
+        common = (answer > 0) & (self._answer > 0)
+        user_weight = numpy.where(common, self._weight, 0)
+        candidate_weight = numpy.where(common, weight, 0)
+        user_accepts = (self._acceptable >> answer) & 1
+        candidate_accepts = (acceptable >> self._answer) & 1
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            user_satisfaction = (
+                (user_weight * user_accepts).sum(axis=1) /
+                user_weight.sum(axis=1)
+            )
+            candidate_satisfaction = (
+                (candidate_weight * candidate_accepts).sum(axis=1) /
+                candidate_weight.sum(axis=1)
+            )
+        return user_satisfaction, candidate_satisfaction, common.sum(axis=1)
+
+    def score(self, answers_list):
+        """
+        :param answers_list: A list with a dict from question id to
+                             :data:`~.Answer` for each candidate.
+        :returns: Arrays of the match and enemy percentages of each
+                  candidate, which are NaN for candidates that have no
+                  weighted question in common with the logged in user.
+        """
+        user_satisfaction, candidate_satisfaction, common_count = \
+            self.satisfaction(answers_list)
+        with numpy.errstate(invalid='ignore', divide='ignore'):
+            margin = (1.0 / common_count if self.margin_of_error
+                      else numpy.zeros(len(common_count)))
+            match = numpy.sqrt(user_satisfaction * candidate_satisfaction)
+            enemy = numpy.sqrt((1 - user_satisfaction) *
+                               (1 - candidate_satisfaction))
+            match = numpy.clip(match - margin, 0, 1) * 100
+            enemy = numpy.clip(enemy - margin, 0, 1) * 100
+        return match, enemy
+
+    def rank(self, candidates):
+        """
+        :param candidates: A dict from an identifier, like a username, to the
+                           dict from question id to :data:`~.Answer` of that
+                           candidate.
+        :returns: A list of `(identifier, match, enemy)` tuples ordered from
+                  the highest to the lowest match percentage, with the
+                  candidates that could not be scored last.
+        """
+        identifiers = list(candidates)
+        match, enemy = self.score([candidates[identifier]
+                                   for identifier in identifiers])
+        order = numpy.argsort(
+            numpy.where(numpy.isnan(match), numpy.inf, -match),
+            kind='mergesort'
+        )
+        return [(identifiers[index], float(match[index]), float(enemy[index]))
+                for index in order]
+
+
+#: How closely estimated percentages agree with the ones okcupid.com reports.
+#: `within_tolerance` is the portion of estimates that are at most the
+#: tolerance away from the reported value. Estimates that are NaN are not
+#: counted.
+ValidationReport = collections.namedtuple(
+    'ValidationReport',
+    ['count', 'mean_absolute_error', 'max_absolute_error', 'within_tolerance']
+)
+
+
+def compare(estimated, reported, tolerance=5):
+    """Compare estimated percentages to the percentages that okcupid.com
+    reported for the same users.
+
+    :returns: A :data:`~.ValidationReport`.
+    """
+    estimated = numpy.asarray(estimated, dtype=numpy.float64)
+    reported = numpy.asarray(reported, dtype=numpy.float64)
+    scored = ~(numpy.isnan(estimated) | numpy.isnan(reported))
+    if not scored.any():
+        return ValidationReport(0, None, None, None)
+    error = numpy.abs(estimated[scored] - reported[scored])
+    return ValidationReport(int(scored.sum()), float(error.mean()),
+                            float(error.max()),
+                            float((error <= tolerance).mean()))
+
+
+def validate(scorer, profiles, catalog=None, tolerance=5):
+    """Score `profiles` locally and compare the results to the match and
+    enemy percentages that okcupid.com reports for them. This fetches the
+    profile page and questions of every profile, so it is meant to check
+    a scorer against a sample rather than to be run with every ranking.
+
+    :param scorer: A :class:`~.MatchScorer` for the logged in user.
+    :param profiles: An iterable of :class:`~okcupyd.profile.Profile`.
+    :param catalog: The question catalog to look answer ids up in.
+    :returns: A dict with a :data:`~.ValidationReport` for 'match' and one
+              for 'enemy'.
+    """
+    answers_list = []
+    reported_match = []
+    reported_enemy = []
+    for profile in profiles:
+        answers_list.append(answers_from_questions(
+            profile.questions, scorer.user_answers, catalog=catalog
+        ))
+        reported_match.append(profile.match_percentage)
+        reported_enemy.append(profile.enemy_percentage)
+    match, enemy = scorer.score(answers_list)
+    reports = {'match': compare(match, reported_match, tolerance=tolerance),
+               'enemy': compare(enemy, reported_enemy, tolerance=tolerance)}
+    log.info(simplejson.dumps({name: report._asdict()
+                               for name, report in reports.items()}))
+    return reports
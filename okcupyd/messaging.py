@@ -1,3 +1,4 @@
+from collections import OrderedDict, namedtuple
 import logging
 
 from lxml import html
@@ -15,14 +16,151 @@ thread_element_xpath = XPathBuilder(relative=False).li.with_classes('thread',
                                                                     'message')
 
 
-def ThreadFetcher(session, mailbox_number):
+def ThreadFetcher(session, mailbox_number, thread_index=None,
+                  lightweight=False):
+    """
+    :param thread_index: A :class:`~.ThreadIndex` to add fetched threads to.
+    :param lightweight: Yield a :class:`~.ThreadRecord` for each thread instead
+                        of a :class:`~.MessageThread`.
+    """
+    def build_thread(elem):
+        thread = (thread_record(elem) if lightweight
+                  else MessageThread(session, elem))
+        if thread_index is not None:
+            thread_index.add(thread)
+        return thread
     return util.FetchMarshall(
         ThreadHTMLFetcher(session, mailbox_number),
-        util.SimpleProcessor(
-            session, lambda elem: MessageThread(session, elem),
-            thread_element_xpath
-        )
+        util.SimpleProcessor(session, build_thread, thread_element_xpath)
+    )
+
+
+def fetch_messages(threads, concurrency=4):
+    """Fetch and parse the messages of many :class:`~.MessageThread` objects
+    in parallel. The messages are cached on the `messages`
+    :class:`~okcupyd.util.fetchable.Fetchable` of each thread, so threads whose
+    messages were already fetched do not cause any requests.
+
+    :param threads: The threads whose messages should be fetched. A thread
+                    that is passed more than once is only fetched once.
+    :param concurrency: The maximum number of requests in flight at once.
+    :returns: A list of the threads that were passed in.
+    """
+    threads = list(threads)
+    # Two workers filling the same cache would both fetch its messages.
+    id_to_thread = OrderedDict(
+        (id(thread), thread) for thread in threads
     )
+    util.map_concurrently(lambda thread: thread.messages[:],
+                          id_to_thread.values(), concurrency=concurrency)
+    return threads
+
+
+ThreadRecord = namedtuple('ThreadRecord',
+                          ('id', 'correspondent', 'datetime', 'read'))
+
+
+def _has_class(element, class_name):
+    return class_name in element.attrib.get('class', '').split()
+
+
+def _first_text(element):
+    texts = [element.text] + [child.tail for child in element]
+    return next((text for text in texts if text is not None), None)
+
+
+def thread_record(thread_element):
+    """Build a :class:`~.ThreadRecord` from a thread element in a single pass
+    over its descendants. The correspondent and datetime are None if they
+    could not be found.
+    """
+    correspondent = timestamp = None
+    for element in thread_element.iter('span'):
+        if (correspondent is None and _has_class(element, 'subject') and
+            _has_class(element.getparent(), 'open')):
+            correspondent = _first_text(element)
+        elif (timestamp is None and _has_class(element, 'fancydate') and
+              _has_class(element.getparent(), 'timestamp')):
+            timestamp = _first_text(element)
+    return ThreadRecord(
+        thread_element.attrib['data-threadid'],
+        correspondent.strip() if correspondent is not None else None,
+        helpers.parse_date_updated(timestamp) if timestamp else None,
+        'unreadMessage' not in thread_element.attrib['class']
+    )
+
+
+class ThreadIndex(object):
+    """Map the usernames of correspondents to the id of the
+    :class:`~.MessageThread` in which the logged in user is conversing with
+    them. The index is filled in as mailbox pages are fetched by a
+    :func:`~.ThreadFetcher` that it is passed to.
+
+    A `loader` can be provided to look up correspondents that have not been
+    seen yet, e.g. from threads that were synced to the database:
+
+    .. code:: python
+
+        from okcupyd import User
+        from okcupyd.db import user as db_user
+
+        user = User()
+        user.thread_index.loader = lambda correspondent: (
+            db_user.thread_okc_id_by_username(user.profile.username,
+                                              correspondent)
+        )
+    """
+
+    def __init__(self, loader=None):
+        self._correspondent_to_thread_id = {}
+        self._thread_id_to_thread = {}
+        self.loader = loader
+
+    def add(self, thread):
+        try:
+            correspondent = thread.correspondent
+        except errors.NoCorrespondentError:
+            return
+        if correspondent is None:
+            return
+        self[correspondent] = thread.id
+        if isinstance(thread, MessageThread):
+            self._thread_id_to_thread[str(thread.id)] = thread
+
+    def discard_thread_ids(self, thread_ids):
+        thread_ids = set(str(thread_id) for thread_id in thread_ids)
+        for correspondent, thread_id in list(
+            self._correspondent_to_thread_id.items()
+        ):
+            if str(thread_id) in thread_ids:
+                del self._correspondent_to_thread_id[correspondent]
+        for thread_id in thread_ids:
+            self._thread_id_to_thread.pop(thread_id, None)
+
+    def get(self, correspondent):
+        """
+        :returns: The id of the thread with `correspondent` or None if no
+                  such thread is known.
+        """
+        key = correspondent.lower()
+        if key not in self._correspondent_to_thread_id and self.loader:
+            thread_id = self.loader(correspondent)
+            if thread_id is not None:
+                self._correspondent_to_thread_id[key] = thread_id
+        return self._correspondent_to_thread_id.get(key)
+
+    def get_thread(self, thread_id):
+        """
+        :returns: The :class:`~.MessageThread` with id `thread_id` if it was
+                  added to this index, otherwise None.
+        """
+        return self._thread_id_to_thread.get(str(thread_id))
+
+    def __setitem__(self, correspondent, thread_id):
+        self._correspondent_to_thread_id[correspondent.lower()] = thread_id
+
+    def __len__(self):
+        return len(self._correspondent_to_thread_id)
 
 
 class ThreadHTMLFetcher(object):
@@ -201,11 +339,24 @@ class MessageThread(object):
     def __init__(self, session, thread_element):
         self._session = session
         self._thread_element = thread_element
-        self.reply = self.correspondent_profile.message(thread_id=self.id)
-        self._message_fetcher = MessageFetcher(self._session, self)
-        #: A :class:`~okcupyd.util.fetchable.Fetchable` of :class:`~.Message`
-        #: objects.
-        self.messages = util.Fetchable(self._message_fetcher)
+
+    def reply(self, message):
+        """Send `message` to the correspondent of this thread as a reply.
+
+        :param message: The body of the message.
+        """
+        return self.correspondent_profile.message(message, thread_id=self.id)
+
+    @util.cached_property
+    def _message_fetcher(self):
+        return MessageFetcher(self._session, self)
+
+    @util.cached_property
+    def messages(self):
+        """A :class:`~okcupyd.util.fetchable.Fetchable` of :class:`~.Message`
+        objects.
+        """
+        return util.Fetchable(self._message_fetcher)
 
     @util.cached_property
     def id(self):
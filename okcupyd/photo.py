@@ -31,13 +31,17 @@ class PhotoUploader(object):
             u'profile/{0}/photos#upload'.format(self._session.log_in_name)
         ).content)
 
+    @util.cached_property
+    def _js_variables(self):
+        return helpers.get_js_variables(self._photo_tree)
+
     @util.cached_property
     def _authcode(self):
-        return helpers.get_authcode(self._photo_tree)
+        return helpers.find_js_variable(self._js_variables, 'AUTHCODE')
 
     @util.cached_property
     def _user_id(self):
-        return helpers.get_current_user_id(self._photo_tree)
+        return helpers.find_js_variable(self._js_variables, 'CURRENTUSERID')
 
     def upload(self, incoming):
         if isinstance(incoming, Info):
@@ -16,6 +16,12 @@ from .xpath import xpb
 log = logging.getLogger(__name__)
 
 
+#: A :class:`~okcupyd.util.cached_property` whose value is read from the
+#: profile page. These are the only properties that are reloaded after an
+#: action that changes the profile page, like sending a message.
+page_property = util.cached_property.in_groups('page')
+
+
 class Profile(object):
     """Represent the profile of an okcupid user.
 
@@ -69,13 +75,17 @@ class Profile(object):
                             "passed to Profile constructor.")
             self.__dict__[key] = value
 
-    def refresh(self, reload=False):
+    def refresh(self, reload=False, groups=None):
         """
         :param reload: Make the request to return a new profile tree. This will
                        result in the caching of the profile_tree attribute. The
                        new profile_tree will be returned.
+        :param groups: Only bust the cached properties that belong to these
+                       invalidation groups. All of them are busted if this is
+                       None.
         """
-        util.cached_property.bust_caches(self, excludes=('authcode'))
+        util.cached_property.bust_caches(self, excludes=('authcode',),
+                                         groups=groups)
         self.questions = self.question_fetchable()
         if reload:
             return self.profile_tree
@@ -87,13 +97,13 @@ class Profile(object):
                    belong to the same user and False otherwise."""
         return self._session.log_in_name.lower() == self.username.lower()
 
-    @util.cached_property
+    @page_property
     def _profile_response(self):
         return self._session.okc_get(
             u'profile/{0}'.format(self.username)
         ).content
 
-    @util.cached_property
+    @page_property
     def profile_tree(self):
         """
         :returns: a :class:`lxml.etree` created from the html of the profile
@@ -114,9 +124,13 @@ class Profile(object):
             'from_profile': 1
         }
 
-    @util.cached_property
+    @page_property
+    def _js_variables(self):
+        return helpers.get_js_variables(self.profile_tree)
+
+    @page_property
     def authcode(self):
-        return helpers.get_authcode(self.profile_tree)
+        return helpers.find_js_variable(self._js_variables, 'AUTHCODE')
 
     _xpbs[None]['photo_info'] = xpb.div.with_class('photo').img.select_attribute_('src')
 
@@ -171,7 +185,7 @@ class Profile(object):
         comparison_text = tree.xpath("//*[@id='question_comparison']/p/text()")[0]
         return int(comparison_text.split()[-2])
 
-    @util.cached_property
+    @page_property
     def looking_for(self):
         """
         :returns: A :class:`~okcupyd.looking_for.LookingFor` instance associated
@@ -191,7 +205,7 @@ class Profile(object):
         """
         return 5 if self.liked else 0
 
-    @util.cached_property
+    @page_property
     def liked(self):
         """
         :returns: Whether or not the logged in user liked this profile
@@ -205,7 +219,7 @@ class Profile(object):
         with_classes('actions2015-chat', 'flatbutton', 'blue').\
         select_attribute_('data-tooltip')
 
-    @util.cached_property
+    @page_property
     def contacted(self):
         """
         :retuns: A boolean indicating whether the logged in user has contacted
@@ -219,7 +233,7 @@ class Profile(object):
             timestamp = contacted_span.replace('Last contacted ', '')
             return helpers.parse_date_updated(timestamp)
 
-    @util.cached_property
+    @page_property
     def responds(self):
         """
         :returns: The frequency with which the user associated with this profile
@@ -233,7 +247,7 @@ class Profile(object):
     _xpbs[False]['id'] = xpb.button.with_class('binary_rating_button').\
         select_attribute_("data-tuid")
 
-    @util.cached_property
+    @page_property
     def id(self):
         """
         :returns: The id that okcupid.com associates with this profile.
@@ -242,11 +256,12 @@ class Profile(object):
             return self._current_user_id
         return int(self._xpbs[False]['id'].one_(self.profile_tree))
 
-    @util.cached_property
+    @page_property
     def _current_user_id(self):
-        return int(helpers.get_id(self.profile_tree))
+        return int(helpers.find_js_variable(self._js_variables,
+                                            'CURRENTUSERID'))
 
-    @util.cached_property
+    @page_property
     def essays(self):
         """
         :returns: A :class:`~okcupyd.essay.Essays` instance that is
@@ -257,7 +272,7 @@ class Profile(object):
     _xpbs[False]['age'] = xpb.span.with_class('userinfo2015-basics-asl-age')
     _xpbs[True]['age'] = xpb.span(id='ajax_age')
 
-    @util.cached_property
+    @page_property
     def age(self):
         """
         :returns: The age of the user associated with this profile.
@@ -266,7 +281,7 @@ class Profile(object):
 
     _xpbs[None]['percentages_and_ratings'] = xpb.div.with_class('matchanalysis2015-graphs')
 
-    @util.cached_property
+    @page_property
     def match_percentage(self):
         """
         :returns: The match percentage of the logged in user and the user
@@ -278,7 +293,7 @@ class Profile(object):
                    canvas.select_attribute_('data-pct').
                    one_(self.profile_tree))
 
-    @util.cached_property
+    @page_property
     def enemy_percentage(self):
         """
         :returns: The enemy percentage of the logged in user and the user
@@ -293,7 +308,7 @@ class Profile(object):
     _xpbs[False]['location'] = xpb.span.with_class('userinfo2015-basics-asl-location')
     _xpbs[True]['location'] = xpb.span(id='ajax_location')
 
-    @util.cached_property
+    @page_property
     def location(self):
         """
         :returns: The location of the user associated with this profile.
@@ -302,7 +317,7 @@ class Profile(object):
 
     _xpbs[True]['gender'] = xpb.span.with_class('ajax_gender')
 
-    @util.cached_property
+    @page_property
     def gender(self):
         """The gender of the user associated with this profile."""
         if self.is_logged_in_user:
@@ -312,7 +327,7 @@ class Profile(object):
 
     _xpbs[True]['orientation'] = xpb.dd(id='ajax_orientation')
 
-    @util.cached_property
+    @page_property
     def orientation(self):
         """The sexual orientation of the user associated with this profile."""
         if self.is_logged_in_user:
@@ -330,7 +345,7 @@ class Profile(object):
         return_value = helpers.Messager(self._session).send(
             self.username, message, self.authcode, thread_id
         )
-        self.refresh(reload=False)
+        self.refresh(reload=False, groups=('page',))
         return return_value
 
     @util.cached_property
@@ -378,7 +393,7 @@ class Profile(object):
         log_function(simplejson.dumps({'rate_response': response_json,
                                        'sent_parameters': parameters,
                                        'headers': dict(self._session.headers)}))
-        self.refresh(reload=False)
+        self.refresh(reload=False, groups=('page',))
 
     def find_question(self, question_id, question_fetchable=None):
         """
@@ -388,9 +403,7 @@ class Profile(object):
                                    will be used.
         """
         question_fetchable = question_fetchable or self.questions
-        for question in question_fetchable:
-            if int(question.id) == int(question_id):
-                return question
+        return question_fetchable.index('id').get(int(question_id))
 
     def question_fetchable(self, **kwargs):
         """
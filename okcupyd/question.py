@@ -1,6 +1,12 @@
+import collections
 import functools
 import logging
+import sqlite3
+import threading
 
+import simplejson
+
+from . import settings
 from . import util
 from .xpath import xpb
 
@@ -8,6 +14,131 @@ from .xpath import xpb
 log = logging.getLogger(__name__)
 
 
+#: The global facts about a question that are stored in a question catalog.
+#: `options` is a tuple of `(answer_id, text)` pairs, or None if the answer
+#: options of the question have not been seen yet.
+CatalogEntry = collections.namedtuple('CatalogEntry', ['text', 'options'])
+
+
+class MemoryQuestionCatalog(object):
+    """An in process catalog of the text and answer options of questions,
+    keyed by question id.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, question_id):
+        """
+        :returns: The :data:`~.CatalogEntry` of the question with id
+                  `question_id`, or None if it has not been seen.
+        """
+        return self._entries.get(question_id)
+
+    def add(self, question_id, text, options=None):
+        """Record the text and answer options of a question. Entries are never
+        overwritten, except to fill in options that were not known before.
+
+        :param options: An iterable of `(answer_id, text)` pairs.
+        :returns: The :data:`~.CatalogEntry` for the question.
+        """
+        with self._lock:
+            entry = self._entries.get(question_id)
+            if entry is None or (entry.options is None and options):
+                entry = CatalogEntry(
+                    entry.text if entry else text,
+                    tuple(map(tuple, options)) if options else None
+                )
+                self._entries[question_id] = entry
+            return entry
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteQuestionCatalog(MemoryQuestionCatalog):
+    """A question catalog kept in a SQLite database file so that it can be
+    shared between processes and sessions. Entries that have been read are
+    also kept in memory.
+    """
+
+    def __init__(self, file_path, timeout=30):
+        """
+        :param file_path: The path of the SQLite database file.
+        :param timeout: The number of seconds to wait for a lock held by
+                        another process.
+        """
+        super(SQLiteQuestionCatalog, self).__init__()
+        self.file_path = file_path
+        self._connection = sqlite3.connect(file_path, timeout=timeout,
+                                           check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS question_catalog ('
+                'question_id INTEGER PRIMARY KEY, text TEXT NOT NULL, '
+                'options TEXT)'
+            )
+
+    def get(self, question_id):
+        entry = self._entries.get(question_id)
+        if entry is not None:
+            return entry
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT text, options FROM question_catalog '
+                'WHERE question_id = ?', (question_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return super(SQLiteQuestionCatalog, self).add(
+            question_id, row[0], row[1] and simplejson.loads(row[1])
+        )
+
+    def add(self, question_id, text, options=None):
+        entry = super(SQLiteQuestionCatalog, self).add(question_id, text,
+                                                       options)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR IGNORE INTO question_catalog '
+                '(question_id, text) VALUES (?, ?)', (question_id, entry.text)
+            )
+            if entry.options is not None:
+                self._connection.execute(
+                    'UPDATE question_catalog SET options = ? '
+                    'WHERE question_id = ? AND options IS NULL',
+                    (simplejson.dumps(entry.options), question_id)
+                )
+        return entry
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM question_catalog'
+            ).fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+_default_catalogs = {}
+_default_catalogs_lock = threading.Lock()
+
+
+def default_question_catalog():
+    """Get the catalog that questions use when none is provided, as
+    configured in :mod:`~okcupyd.settings`. One catalog is kept per
+    configuration, so questions share their entries and, for a SQLite
+    catalog, a single connection.
+    """
+    key = settings.QUESTION_CATALOG_FILE
+    with _default_catalogs_lock:
+        if key not in _default_catalogs:
+            _default_catalogs[key] = (SQLiteQuestionCatalog(key) if key
+                                      else MemoryQuestionCatalog())
+        return _default_catalogs[key]
+
+
 class BaseQuestion(object):
     """The abstract base class of :class:`~.Question` and
     :class:`~.UserQuestion`. Contains all the shared functionality of the
@@ -16,8 +147,16 @@ class BaseQuestion(object):
     details.
     """
 
-    def __init__(self, question_element):
+    def __init__(self, question_element, catalog=None):
+        """
+        :param question_element: The html element of the question.
+        :param catalog: The question catalog that the text and answer options
+                        of the question are read from and recorded in.
+                        Defaults to :func:`~.default_question_catalog`.
+        """
         self._question_element = question_element
+        self._catalog = catalog if catalog is not None \
+                        else default_question_catalog()
 
     @property
     def answered(self):
@@ -32,9 +171,23 @@ class BaseQuestion(object):
 
     _text_xpb = xpb.div.with_class('qtext').p
 
+    @util.cached_property
+    def catalog_entry(self):
+        """
+        :returns: The :data:`~.CatalogEntry` of this question, recording its
+                  text in the catalog if it has not been seen before.
+        """
+        entry = self._catalog.get(self.id)
+        if entry is None:
+            entry = self._catalog.add(
+                self.id,
+                self._text_xpb.get_text_(self._question_element).strip()
+            )
+        return entry
+
     @util.cached_property
     def text(self):
-        return self._text_xpb.get_text_(self._question_element).strip()
+        return self.catalog_entry.text
 
     def __repr__(self):
         return u'<{1}: {0}>'.format(self.text, type(self).__name__)
@@ -63,8 +216,8 @@ class Question(BaseQuestion):
     _answers_xpb = xpb.div.with_class('answers').\
                    p.with_class('answer')
 
-    def __init__(self, question_element):
-        super(Question, self).__init__(question_element)
+    def __init__(self, question_element, catalog=None):
+        super(Question, self).__init__(question_element, catalog=catalog)
         try:
             self._their_answer_span, self._my_answer_span = (
                 self._answers_xpb.span.with_class('text').apply_(
@@ -171,12 +324,20 @@ class UserQuestion(BaseQuestion):
         :returns: A list of :class:`~.AnswerOption` instances representing the
                   available answers to this question.
         """
-        return [
-            AnswerOption(element)
-            for element in self._answer_option_xpb.apply_(
-                self._question_element
+        elements = self._answer_option_xpb.apply_(self._question_element)
+        options = self.catalog_entry.options
+        if options is not None and len(options) == len(elements):
+            # Only the classes of the elements, which describe the answer of
+            # the logged in user, need to be read.
+            return [AnswerOption(element, answer_id, text)
+                    for element, (answer_id, text) in zip(elements, options)]
+        answer_options = [AnswerOption(element) for element in elements]
+        if answer_options:
+            self.catalog_entry = self._catalog.add(
+                self.id, self.text,
+                [(option.id, option.text) for option in answer_options]
             )
-        ]
+        return answer_options
 
     @util.cached_property
     def explanation(self):
@@ -206,8 +367,17 @@ class UserQuestion(BaseQuestion):
 
 class AnswerOption(object):
 
-    def __init__(self, option_element):
+    def __init__(self, option_element, id=None, text=None):
+        """
+        :param option_element: The html element of the answer option.
+        :param id: The id of the option, if it is already known.
+        :param text: The text of the option, if it is already known.
+        """
         self._element = option_element
+        if id is not None:
+            self.__dict__['id'] = id
+        if text is not None:
+            self.__dict__['text'] = text
 
     @util.cached_property
     def is_users(self):
@@ -385,7 +555,9 @@ _total_page_xpb = _page_data_xpb.input(id='questions_pages_total').\
 _question_xpb = xpb.div.with_class('question')
 
 
-def QuestionProcessor(question_class):
+def QuestionProcessor(question_class, catalog=None):
+    if catalog is not None:
+        question_class = functools.partial(question_class, catalog=catalog)
     return util.PaginationProcessor(question_class, _question_xpb,
                                     _current_page_xpb, _total_page_xpb)
 
@@ -413,10 +585,10 @@ class QuestionHTMLFetcher(object):
 
 
 def QuestionFetcher(session, username, question_class=Question,
-                    is_user=False, **kwargs):
+                    is_user=False, catalog=None, **kwargs):
     if is_user:
         question_class = UserQuestion
     return util.FetchMarshall(
         QuestionHTMLFetcher.from_username(session, username, **kwargs),
-        QuestionProcessor(question_class)
+        QuestionProcessor(question_class, catalog=catalog)
     )
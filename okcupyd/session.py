@@ -1,5 +1,6 @@
 import logging
 import random
+import threading
 import time
 
 import requests
@@ -116,15 +117,19 @@ class RateLimiter(object):
             wait_std_dev = float(rate_limit) / 5
         self.wait_std_dev = wait_std_dev
         self.last_request = None
+        self._lock = threading.Lock()
 
     def wait(self):
         if self.rate_limit is None: return
-        if self.last_request is not None:
-            wait_time = random.gauss(self.rate_limit, self.wait_std_dev)
-            elapsed = time.time() - self.last_request
-            if elapsed < wait_time:
-                time.sleep(wait_time - elapsed)
-        self.last_request = time.time()
+        # Held while sleeping so that requests made from several threads
+        # are still spaced out by the rate limit.
+        with self._lock:
+            if self.last_request is not None:
+                wait_time = random.gauss(self.rate_limit, self.wait_std_dev)
+                elapsed = time.time() - self.last_request
+                if elapsed < wait_time:
+                    time.sleep(wait_time - elapsed)
+            self.last_request = time.time()
 
 
 def build_okc_method(method_name):
@@ -8,5 +8,23 @@ USERNAME = os.environ.get('OKC_USERNAME')
 #: The password that will be used to log in to okcupid
 PASSWORD = os.environ.get('OKC_PASSWORD')
 
+#: The SQLAlchemy url of the database used by :mod:`okcupyd.db`. Defaults to
+#: a SQLite file inside the okcupyd.db package.
+DB_URL = os.environ.get('OKC_DB_URL')
+
+#: A SQLite file in which the text and answer options of questions are
+#: cataloged. The catalog is kept in memory if this is not set.
+QUESTION_CATALOG_FILE = os.environ.get('OKC_QUESTION_CATALOG_FILE')
+
 AF_USERNAME = os.environ.get('AF_USERNAME', USERNAME)
 AF_PASSWORD = os.environ.get('AF_PASSWORD', PASSWORD)
+
+#: A SQLite file in which attractiveness results are cached. Results are kept
+#: in memory if this is not set.
+AF_CACHE_FILE = os.environ.get('AF_CACHE_FILE')
+#: The number of seconds after which cached attractiveness results expire.
+AF_CACHE_TTL = (float(os.environ['AF_CACHE_TTL'])
+                if os.environ.get('AF_CACHE_TTL') else None)
+#: The maximum number of attractiveness results that are cached in memory.
+AF_CACHE_SIZE = (int(os.environ['AF_CACHE_SIZE'])
+                 if os.environ.get('AF_CACHE_SIZE') else None)
@@ -1,51 +1,108 @@
 import itertools
 import numbers
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 from . import util
 from .attractiveness_finder import AttractivenessFinder
+from .messaging import fetch_messages
 
 
 class Statistics(object):
 
     def __init__(self, user, message_threads=None, filters=(),
-                 attractiveness_finder=None):
+                 attractiveness_finder=None, concurrency=4):
         self._user = user
         self._message_threads = message_threads or set(itertools.chain(user.inbox,
                                                                        user.outbox))
         self._filters = filters
         self._attractiveness_finder = attractiveness_finder or AttractivenessFinder()
+        self._concurrency = concurrency
+
+    def _with_messages(self, *filters):
+        # Fetch the messages of every thread in parallel before the filters
+        # read them one thread at a time.
+        fetch_messages(self.threads, concurrency=self._concurrency)
+        return self.with_filters(*filters)
 
     def _thread_matches(self, message_thread):
         return all(f(message_thread) for f in self._filters)
 
+    @staticmethod
+    def from_database(user):
+        """
+        :returns: A :class:`okcupyd.db.statistics.Statistics` that computes
+                  statistics from the threads of `user` that
+                  :class:`~okcupyd.db.mailbox.Sync` has stored, without
+                  making any requests for the threads themselves.
+        """
+        from .db.statistics import Statistics as DBStatistics
+        return DBStatistics(user.profile.id)
+
+    def columnar(self):
+        """
+        :returns: A :class:`~.ColumnarStatistics` over the threads that pass
+                  the filters of this :class:`~.Statistics`.
+        """
+        return ColumnarStatistics(
+            self._user, self.threads,
+            attractiveness_finder=self._attractiveness_finder,
+            concurrency=self._concurrency
+        )
+
     @util.cached_property
     def threads(self):
         return set(mt for mt in self._message_threads if self._thread_matches(mt))
 
     @util.cached_property
     def has_messages(self):
-        return self.with_filters(lambda mt: mt.has_messages)
+        return self._with_messages(lambda mt: mt.has_messages)
 
     @util.cached_property
     def has_response(self):
-        return self.with_filters(lambda mt: mt.got_response)
+        return self._with_messages(lambda mt: mt.got_response)
 
     @util.cached_property
     def no_responses(self):
-        return self.with_filters(lambda mt: not mt.got_response)
+        return self._with_messages(lambda mt: not mt.got_response)
 
     @util.cached_property
     def initiated(self):
-        return self.with_filters(lambda mt: mt.initiator == self._user.profile)
+        return self._with_messages(
+            lambda mt: mt.initiator == self._user.profile
+        )
 
     @util.cached_property
     def received(self):
-        return self.with_filters(lambda mt: mt.initiator != self._user.profile)
+        return self._with_messages(
+            lambda mt: mt.initiator != self._user.profile
+        )
 
     @util.cached_property
     def has_attractiveness(self):
-        return self.with_filters(lambda mt: self._attractiveness_finder.find_attractiveness(
-            mt.correspondent) is not None)
+        attractiveness = self.correspondent_attractiveness()
+        return self.with_filters(
+            lambda mt: attractiveness[mt.correspondent] is not None
+        )
+
+    def correspondent_attractiveness(self, attractiveness_finder=None):
+        """
+        :returns: A dict from the correspondent of each thread to their
+                  attractiveness, looked up in a single batch when the
+                  attractiveness finder supports it.
+        """
+        attractiveness_finder = attractiveness_finder or self._attractiveness_finder
+        correspondents = set(mt.correspondent for mt in self.threads)
+        find_many = getattr(attractiveness_finder, 'find_attractiveness_many',
+                            None)
+        if find_many is not None:
+            return find_many(correspondents)
+        return {correspondent: attractiveness_finder.find_attractiveness(
+            correspondent
+        ) for correspondent in correspondents}
 
     def time_filter(self, min_date=None, max_date=None):
         def _time_filter(thread):
@@ -58,11 +115,11 @@ class Statistics(object):
 
     def attractiveness_filter(self, attractiveness_finder=None,
                                    min_attractiveness=0, max_attractiveness=10000):
-        attractiveness_finder = attractiveness_finder or self._attractiveness_finder
+        correspondent_attractiveness = self.correspondent_attractiveness(
+            attractiveness_finder
+        )
         def _attractiveness_filter(thread):
-            attractiveness = attractiveness_finder.find_attractiveness(
-                thread.correspondent
-            )
+            attractiveness = correspondent_attractiveness[thread.correspondent]
             return (isinstance(attractiveness, numbers.Number) and
                     min_attractiveness <= attractiveness <= max_attractiveness)
         return self.with_filters(_attractiveness_filter)
@@ -72,7 +129,8 @@ class Statistics(object):
                           if kwargs.get('apply_filters_immediately', True) \
                           else self._message_threads
         return type(self)(self._user, message_threads, self._filters + filters,
-                          attractiveness_finder=self._attractiveness_finder)
+                          attractiveness_finder=self._attractiveness_finder,
+                          concurrency=self._concurrency)
 
     @property
     def count(self):
@@ -87,18 +145,20 @@ class Statistics(object):
 
     @property
     def average_first_message_length(self):
+        fetch_messages(self.threads, concurrency=self._concurrency)
         return self._average(lambda thread: len(thread.messages[0].content))
 
     @property
     def average_conversation_length(self):
+        fetch_messages(self.threads, concurrency=self._concurrency)
         return self._average(lambda thread: thread.message_count)
 
     def _average_attractiveness(self, attractiveness_finder=None):
-        attractiveness_finder = attractiveness_finder or self._attractiveness_finder
-        return self.has_attractiveness._average(lambda thread: (
-            attractiveness_finder.find_attractiveness(
-                thread.correspondent
-            ))
+        has_attractiveness = self.has_attractiveness
+        correspondent_attractiveness = \
+            has_attractiveness.correspondent_attractiveness(attractiveness_finder)
+        return has_attractiveness._average(
+            lambda thread: correspondent_attractiveness[thread.correspondent]
         )
 
     @property
@@ -112,3 +172,189 @@ class Statistics(object):
     @property
     def portion_received(self):
         return 1 - self.portion_initiated
+
+
+class ThreadColumns(object):
+    """The facts that :class:`~.ColumnarStatistics` aggregates, loaded once
+    for every thread into numpy arrays that share the order of
+    :attr:`.threads`.
+    """
+
+    def __init__(self, user, threads, attractiveness_finder=None,
+                 concurrency=4):
+        if numpy is None:
+            raise ImportError('numpy is required for ColumnarStatistics.')
+        self.threads = list(threads)
+        self._user = user
+        self._attractiveness_finder = (attractiveness_finder or
+                                       AttractivenessFinder())
+        fetch_messages(self.threads, concurrency=concurrency)
+        user_profile = user.profile
+        initiated, got_response, message_count, first_message_length = \
+            [], [], [], []
+        for thread in self.threads:
+            messages = thread.messages
+            initiator = messages[0].sender if messages else None
+            initiated.append(initiator == user_profile)
+            got_response.append(any(message.sender != initiator
+                                    for message in messages))
+            message_count.append(len(messages))
+            first_message_length.append(
+                len(messages[0].content) if messages else 0
+            )
+        self.initiated = numpy.array(initiated, dtype=bool)
+        self.got_response = numpy.array(got_response, dtype=bool)
+        self.message_count = numpy.array(message_count, dtype=numpy.int64)
+        self.first_message_length = numpy.array(first_message_length,
+                                                dtype=numpy.int64)
+        self.date = numpy.array([thread.date for thread in self.threads],
+                                dtype='datetime64[D]')
+
+    def __len__(self):
+        return len(self.threads)
+
+    @util.cached_property
+    def attractiveness(self):
+        """The attractiveness of the correspondent of each thread, or nan
+        where it is unknown. The correspondents are looked up in a single
+        batch the first time this is accessed.
+        """
+        correspondents = set(thread.correspondent for thread in self.threads)
+        find_many = getattr(self._attractiveness_finder,
+                            'find_attractiveness_many', None)
+        if find_many is not None:
+            correspondent_attractiveness = find_many(correspondents)
+        else:
+            correspondent_attractiveness = {
+                correspondent: self._attractiveness_finder.find_attractiveness(
+                    correspondent
+                ) for correspondent in correspondents
+            }
+        return numpy.array([
+            _as_float(correspondent_attractiveness.get(thread.correspondent))
+            for thread in self.threads
+        ], dtype=float)
+
+
+def _as_float(value):
+    return float(value) if isinstance(value, numbers.Number) else numpy.nan
+
+
+class ColumnarStatistics(object):
+    """Compute the same statistics as :class:`~.Statistics` from the facts
+    about every thread, loaded once into a :class:`~.ThreadColumns`. Filters
+    are boolean masks over those columns and aggregates are numpy
+    reductions, so slicing the statistics of a large mailbox does not touch
+    the threads again.
+
+    :param message_threads: The threads to compute statistics over. Defaults
+                            to the inbox and outbox of `user`.
+    """
+
+    def __init__(self, user, message_threads=None, attractiveness_finder=None,
+                 concurrency=4, columns=None, mask=None):
+        self._user = user
+        if columns is None:
+            columns = ThreadColumns(
+                user, message_threads if message_threads is not None
+                else set(itertools.chain(user.inbox, user.outbox)),
+                attractiveness_finder=attractiveness_finder,
+                concurrency=concurrency
+            )
+        self._columns = columns
+        self._mask = (numpy.ones(len(columns), dtype=bool)
+                      if mask is None else mask)
+
+    def with_mask(self, mask):
+        """
+        :param mask: A boolean array over the columns of this
+                     :class:`~.ColumnarStatistics`.
+        :returns: A :class:`~.ColumnarStatistics` restricted to the threads
+                  that are selected by both `mask` and the current mask.
+        """
+        return type(self)(self._user, columns=self._columns,
+                          mask=self._mask & mask)
+
+    def with_filters(self, *filters, **kwargs):
+        """Apply arbitrary per thread predicates like
+        :meth:`.Statistics.with_filters`. Prefer the mask based filters where
+        possible, since these call each predicate once per thread.
+        """
+        mask = numpy.array([all(f(thread) for f in filters)
+                            for thread in self._columns.threads], dtype=bool)
+        return self.with_mask(mask)
+
+    @property
+    def threads(self):
+        return set(itertools.compress(self._columns.threads, self._mask))
+
+    @property
+    def count(self):
+        return int(self._mask.sum())
+
+    @util.cached_property
+    def has_messages(self):
+        return self.with_mask(self._columns.message_count > 0)
+
+    @util.cached_property
+    def has_response(self):
+        return self.with_mask(self._columns.got_response)
+
+    @util.cached_property
+    def no_responses(self):
+        return self.with_mask(~self._columns.got_response)
+
+    @util.cached_property
+    def initiated(self):
+        return self.with_mask(self._columns.initiated)
+
+    @util.cached_property
+    def received(self):
+        return self.with_mask(~self._columns.initiated)
+
+    @util.cached_property
+    def has_attractiveness(self):
+        return self.with_mask(~numpy.isnan(self._columns.attractiveness))
+
+    def time_filter(self, min_date=None, max_date=None):
+        mask = numpy.ones(len(self._columns), dtype=bool)
+        if min_date:
+            mask &= self._columns.date >= numpy.datetime64(min_date, 'D')
+        if max_date:
+            mask &= self._columns.date <= numpy.datetime64(max_date, 'D')
+        return self.with_mask(mask)
+
+    def attractiveness_filter(self, min_attractiveness=0,
+                              max_attractiveness=10000):
+        attractiveness = self._columns.attractiveness
+        with numpy.errstate(invalid='ignore'):
+            mask = ((min_attractiveness <= attractiveness) &
+                    (attractiveness <= max_attractiveness))
+        return self.with_mask(mask)
+
+    def _average(self, column):
+        return float(column[self._mask].mean())
+
+    @property
+    def response_rate(self):
+        return float(self.has_response.count)/self.count
+
+    @property
+    def average_first_message_length(self):
+        return self._average(self._columns.first_message_length)
+
+    @property
+    def average_conversation_length(self):
+        return self._average(self._columns.message_count)
+
+    @property
+    def average_attractiveness(self):
+        return self.has_attractiveness._average(self._columns.attractiveness)
+
+    @property
+    def portion_initiated(self):
+        return float(self.initiated.count)/self.count
+
+    @property
+    def portion_received(self):
+        return 1 - self.portion_initiated
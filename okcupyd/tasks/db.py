@@ -5,7 +5,7 @@ import IPython
 
 from okcupyd import db
 from okcupyd import util
-from okcupyd.db import mailbox, model
+from okcupyd.db import mailbox, migrate, model
 from okcupyd.user import User
 
 
@@ -21,11 +21,17 @@ def session(ctx):
 @task
 def reset(ctx):
     util.enable_logger(__name__)
-    log.info(db.Base.metadata.bind)
+    log.info(db.get_engine())
     db.Base.metadata.drop_all()
     db.Base.metadata.create_all()
 
 
+@task
+def upgrade(ctx):
+    util.enable_logger(migrate.__name__)
+    migrate.upgrade()
+
+
 @task
 def sync(ctx):
     user = User()
@@ -8,7 +8,7 @@ from . import util
 from .attractiveness_finder import AttractivenessFinder
 from .json_search import SearchFetchable, search
 from .location import LocationQueryCache
-from .messaging import ThreadFetcher, MessageThread
+from .messaging import ThreadFetcher, ThreadIndex, MessageThread
 from .photo import PhotoUploader
 from .profile import Profile
 from .profile_copy import Copy
@@ -42,7 +42,7 @@ class User(object):
     _visitors_total_page_xpb = xpb.div.with_class('pages').\
                                a.with_class('last').text_
 
-    def __init__(self, session=None):
+    def __init__(self, session=None, thread_index=None):
         """
         :param session: The session which will be used for interacting
                         with okcupid.com
@@ -50,6 +50,9 @@ class User(object):
                         automatically with the credentials in
                         :mod:`~okcupyd.settings`
         :type session: :class:`~okcupyd.session.Session`
+        :param thread_index: The index used to find existing threads when
+                             messaging other users.
+        :type thread_index: :class:`~okcupyd.messaging.ThreadIndex`
         """
         self._session = session or Session.login()
         self._message_sender = helpers.Messager(self._session)
@@ -60,14 +63,19 @@ class User(object):
         #: in user.
         self.profile = Profile(self._session, self._session.log_in_name)
 
+        #: A :class:`~okcupyd.messaging.ThreadIndex` of the threads that have
+        #: been fetched from the user's inbox and outbox.
+        self.thread_index = thread_index or ThreadIndex()
         #: A :class:`~okcupyd.util.fetchable.Fetchable` of
         #: :class:`~okcupyd.messaging.MessageThread` objects corresponding to
         #: messages that are currently in the user's inbox.
-        self.inbox = util.Fetchable(ThreadFetcher(self._session, 1))
+        self.inbox = util.Fetchable(ThreadFetcher(self._session, 1,
+                                                  self.thread_index))
         #: A :class:`~okcupyd.util.fetchable.Fetchable` of
         #: :class:`~okcupyd.messaging.MessageThread` objects corresponding to
         #: messages that are currently in the user's outbox.
-        self.outbox = util.Fetchable(ThreadFetcher(self._session, 2))
+        self.outbox = util.Fetchable(ThreadFetcher(self._session, 2,
+                                                   self.thread_index))
         #: A :class:`~okcupyd.util.fetchable.Fetchable` of
         #: :class:`~okcupyd.messaging.MessageThread` objects corresponding to
         #: messages that are currently in the user's drafts folder.
@@ -128,13 +136,24 @@ class User(object):
         # Try to reply to an existing thread.
         if not isinstance(username, six.string_types):
             username = username.username
+        thread_id = self.thread_index.get(username)
+        if thread_id is None:
+            thread_id = self._find_thread_id(username)
+        thread = self.thread_index.get_thread(thread_id)
+        if thread is not None:
+            return thread.reply(message_text)
+        message_info = self._message_sender.send(username, message_text,
+                                                 thread_id=thread_id)
+        if message_info.thread_id:
+            self.thread_index[username] = message_info.thread_id
+        return message_info
+
+    def _find_thread_id(self, username):
+        # Threads are added to the thread index as mailbox pages are fetched.
         for mailbox in (self.inbox, self.outbox):
             for thread in mailbox:
                 if thread.correspondent.lower() == username.lower():
-                    thread.reply(message_text)
-                    return
-
-        return self._message_sender.send(username, message_text)
+                    return thread.id
 
     def search(self, **kwargs):
         """Call :func:`~okcupyd.json_search.SearchFetchable` to get a
@@ -168,8 +187,14 @@ class User(object):
                                       :class:`~.MessageThread` instances
                                       or okc_ids of message threads.
         """
-        return MessageThread.delete_threads(self._session,
-                                            thread_ids_or_threads)
+        thread_ids_or_threads = list(thread_ids_or_threads)
+        response = MessageThread.delete_threads(self._session,
+                                                thread_ids_or_threads)
+        self.thread_index.discard_thread_ids(
+            thread.id if isinstance(thread, MessageThread) else thread
+            for thread in thread_ids_or_threads
+        )
+        return response
 
     def reveal_profile_questions(self, profile, refresh_source=True):
         """Answer all unanswered questions for the target profile
@@ -1,9 +1,12 @@
+from multiprocessing.pool import ThreadPool
 import collections
 import functools
 import inspect
 import logging
 import re
+import threading
 import types
+import weakref
 
 import six
 
@@ -35,14 +38,74 @@ def makelist_decorator(function):
     return wrapped
 
 
+def map_concurrently(function, items, concurrency=4):
+    """Apply `function` to each of `items` from at most `concurrency` threads.
+
+    :returns: A list of the results in the order of `items`.
+    """
+    items = list(items)
+    if concurrency <= 1 or len(items) <= 1:
+        return [function(item) for item in items]
+    pool = ThreadPool(min(concurrency, len(items)))
+    try:
+        return pool.map(function, items)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def lru_cache(max_size=128):
+    """Memoize a function of hashable positional arguments, keeping the
+    results of the `max_size` most recently used distinct calls.
+    """
+    def decorator(function):
+        cache = collections.OrderedDict()
+        lock = threading.Lock()
+
+        @functools.wraps(function)
+        def wrapped(*args):
+            with lock:
+                if args in cache:
+                    value = cache.pop(args)
+                    cache[args] = value
+                    return value
+            value = function(*args)
+            with lock:
+                cache[args] = value
+                while len(cache) > max_size:
+                    cache.popitem(last=False)
+            return value
+        wrapped.cache_clear = cache.clear
+        return wrapped
+    return decorator
+
+
 class cached_property(object):
     """Descriptor that caches the result of the first call to resolve its
     contents.
     """
 
-    def __init__(self, func):
+    # Maps each class to the (name, cached_property) pairs of its members.
+    # Members are looked up the first time the caches of an instance of the
+    # class are busted, so properties that are added to a class after that
+    # are not found.
+    _registry = weakref.WeakKeyDictionary()
+
+    def __init__(self, func, groups=()):
+        """
+        :param groups: The names of the invalidation groups that this property
+                       belongs to. See :meth:`.bust_caches`.
+        """
         self.__doc__ = getattr(func, '__doc__')
         self.func = func
+        self.groups = frozenset(groups)
+
+    @classmethod
+    def in_groups(cls, *groups):
+        """Build a decorator that creates :class:`.cached_property` objects
+        belonging to the invalidation `groups`.
+        """
+        return lambda func: cls(func, groups=groups)
 
     def __get__(self, obj, cls):
         if obj is None:
@@ -62,18 +125,33 @@ class cached_property(object):
             delattr(obj, self.func.__name__)
 
     @classmethod
-    def bust_caches(cls, obj, excludes=()):
+    def bust_caches(cls, obj, excludes=(), groups=None):
         """Bust the cache for all :class:`.cached_property` objects on `obj`
 
         :param obj: The instance on which to bust the caches.
+        :param excludes: The names of properties whose caches should be kept.
+        :param groups: If provided, only bust the caches of properties that
+                       belong to at least one of these groups.
         """
-        for name, _ in cls.get_cached_properties(obj):
-            if name in obj.__dict__ and not name in excludes:
+        for name, prop in cls.get_cached_properties(obj):
+            if name in obj.__dict__ and not name in excludes and \
+               (groups is None or not prop.groups.isdisjoint(groups)):
                 delattr(obj, name)
 
     @classmethod
     def get_cached_properties(cls, obj):
-        return inspect.getmembers(type(obj), lambda x: isinstance(x, cls))
+        """
+        :returns: A list of (name, cached_property) pairs, sorted by name, for
+                  the cached properties of the class of `obj`.
+        """
+        klass = type(obj)
+        try:
+            return cls._registry[klass][cls]
+        except KeyError:
+            pass
+        members = inspect.getmembers(klass, lambda x: isinstance(x, cls))
+        cls._registry.setdefault(klass, {})[cls] = members
+        return members
 
 
 class CallableMap(object):
@@ -96,11 +174,27 @@ class CallableMap(object):
         self.func_value_pairs.append((func, value))
 
 
+# Backreferences would refer to the wrong group and inline flags would apply
+# to every expression once expressions are combined into one alternation.
+_uncombinable = re.compile(r'\\[1-9]|\(\?P=|\(\?[aiLmsux]')
+_regex_metacharacters = frozenset('.^$*+?{}[]\\|()')
+
+
 class REMap(object):
-    """A mapping object that matches regular expressions to values."""
+    """A mapping object that matches regular expressions to values.
+
+    The value of the first expression that is found in the looked up item is
+    returned. The expressions are compiled into as few alternations as
+    possible so that a lookup is usually a single regex match, and items that
+    are equal to one of the literal expressions are resolved with a dict
+    lookup.
+    """
 
     NO_DEFAULT = object()
 
+    #: The re module of python 2 supports at most 100 groups per expression.
+    max_groups_per_expression = 99
+
     @classmethod
     def from_string_pairs(cls, string_value_pairs, **kwargs):
         """Build an :class:`~.REMap` from str, value pairs by applying
@@ -122,9 +216,9 @@ class REMap(object):
                 raise KeyError("None does not match any expression")
             else:
                 return self.default
-        for matcher, value in self.re_value_pairs:
-            if matcher.search(item):
-                return value
+        value = self._lookup(item)
+        if value is not self.NO_DEFAULT:
+            return value
         if self.default is not self.NO_DEFAULT:
             if item is not None and len(item) > 1:
                 log.warning("Returning default from REMAP for {0}.".format(
@@ -136,17 +230,114 @@ class REMap(object):
                            'expressions.'.format(repr(item)))
 
     def _get_nodefault(self, item):
-        for matcher, value in self.re_value_pairs:
-            if matcher.search(item):
-                return value
+        value = self._lookup(item)
+        if value is not self.NO_DEFAULT:
+            return value
         raise KeyError('{0} did not match any of this objects regular'
                        'expressions.'.format(repr(item)))
 
+    def _lookup(self, item):
+        value = self._exact_matches.get(item, self.NO_DEFAULT)
+        if value is not self.NO_DEFAULT:
+            return value
+        return self._search(item)
+
+    def _search(self, item):
+        for search, match_at, chunk in self._alternations:
+            found = search(item)
+            if found is None:
+                continue
+            if match_at is None:
+                return chunk[0][1]
+            # At each position the alternation selects the first expression
+            # that matches there, so the first expression that matches
+            # anywhere is the lowest index selected across those positions.
+            index = len(chunk)
+            while found is not None and index:
+                start = found.start()
+                index = min(index,
+                            int(match_at(item, start).lastgroup[1:]))
+                found = search(item, start + 1)
+            return chunk[index][1]
+        return self.NO_DEFAULT
+
+    @cached_property
+    def _alternations(self):
+        """A list of (search, match_at, chunk) triples, where each chunk is a
+        run of consecutive (compiled_regex, value) pairs. `search` is one
+        alternation of the expressions in a chunk, so an item that matches
+        none of them is rejected by a single search. `match_at` is the same
+        alternation with a named group around each expression, and is only
+        used to identify the expression that matched at the positions that
+        `search` finds. Named groups are left out of `search` because they
+        prevent the re module from skipping ahead to the possible first
+        characters of a match.
+        """
+        alternations = []
+        chunk = []
+        for matcher, value in self.re_value_pairs:
+            if not self._can_combine(matcher, chunk):
+                alternations.extend(self._combine(chunk))
+                chunk = []
+            if self._can_combine(matcher, chunk):
+                chunk.append((matcher, value))
+            else:
+                alternations.append((matcher.search, None, [(matcher, value)]))
+        alternations.extend(self._combine(chunk))
+        return alternations
+
+    def _can_combine(self, matcher, chunk):
+        if not isinstance(matcher.pattern, six.text_type) and \
+           not (six.PY2 and isinstance(matcher.pattern, str)):
+            return False
+        if _uncombinable.search(matcher.pattern):
+            return False
+        groups = sum(m.groups + 1 for m, _ in chunk) + matcher.groups + 1
+        if groups > self.max_groups_per_expression:
+            return False
+        return not chunk or matcher.flags == chunk[0][0].flags
+
+    @staticmethod
+    def _combine(chunk):
+        if len(chunk) < 2:
+            return [(matcher.search, None, [(matcher, value)])
+                    for matcher, value in chunk]
+        flags = chunk[0][0].flags
+        try:
+            search = re.compile(u'|'.join(
+                u'(?:{0})'.format(matcher.pattern) for matcher, _ in chunk
+            ), flags)
+            match_at = re.compile(u'|'.join(
+                u'(?P<_{0}>{1})'.format(index, matcher.pattern)
+                for index, (matcher, _) in enumerate(chunk)
+            ), flags)
+        except (re.error, UnicodeError):
+            return [(matcher.search, None, [(matcher, value)])
+                    for matcher, value in chunk]
+        return [(search.search, match_at.match, chunk)]
+
+    @cached_property
+    def _exact_matches(self):
+        """A dict from each literal expression to the value that it is mapped
+        to, which allows the most common lookups to skip regex matching.
+        """
+        exact_matches = {}
+        for matcher, _ in self.re_value_pairs:
+            pattern = matcher.pattern
+            if _regex_metacharacters.intersection(pattern) or \
+               pattern in exact_matches:
+                continue
+            value = self._search(pattern)
+            if value is not self.NO_DEFAULT:
+                exact_matches[pattern] = value
+        return exact_matches
+
     def __setitem__(self, re, value):
         self.add(re, value)
 
-    def add(re, value):
+    def add(self, re, value):
         self.re_value_pairs.append((re, value))
+        cached_property.bust_caches(self)
 
     @property
     def pattern_to_value(self):
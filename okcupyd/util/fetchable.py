@@ -108,6 +108,8 @@ would never update the user.profile.questions instance, and thus what
 would be printed to the screen with each iteration of the for loop.
 """
 import itertools
+import operator
+
 from lxml import html
 
 
@@ -157,8 +159,37 @@ class Fetchable(object):
         else:
             self._accumulated = None
         self._clonable, = itertools.tee(self._original_iterable, 1)
+        self._indexes = {}
         return self
 
+    def stream(self, **kwargs):
+        """Iterate over the items provided by the fetcher without caching
+        them on this :class:`~.Fetchable`. Use this instead of iterating
+        over the fetchable itself when memory use must stay bounded.
+
+        :param kwargs: kwargs that should be passed to the fetcher when its
+                       fetch method is called. These are merged with the
+                       values provided to the constructor.
+        """
+        for key, value in self._kwargs.items():
+            kwargs.setdefault(key, value)
+        return self._fetcher.fetch(**kwargs)
+
+    def index(self, attribute):
+        """
+        :param attribute: The name of the attribute to index items by.
+        :returns: A :class:`~.FetchableIndex` of the items of this
+                  :class:`~.Fetchable` by the value of `attribute`. The index
+                  is kept until :meth:`refresh` is called, so repeated lookups
+                  only go through each item once.
+        """
+        try:
+            return self._indexes[attribute]
+        except KeyError:
+            index = FetchableIndex(iter(self), operator.attrgetter(attribute))
+            self._indexes[attribute] = index
+            return index
+
     @staticmethod
     def _make_nice_repr_iterator(original_iterable, accumulator):
         for item in original_iterable:
@@ -261,6 +292,57 @@ class Fetchable(object):
             return True
 
 
+class FetchableIndex(object):
+    """Map keys to the items of a :class:`~.Fetchable`. The index is filled as
+    lookups read the items of the fetchable, and a lookup stops reading as
+    soon as it finds its key, so only the pages needed to answer it are
+    fetched.
+    """
+
+    def __init__(self, iterator, key):
+        """
+        :param iterator: An iterator over the items to index.
+        :param key: A function that returns the key of an item.
+        """
+        self._iterator = iterator
+        self._key = key
+        self._items = {}
+
+    def get(self, key, default=None):
+        """
+        :returns: The first item whose key is `key`, or `default` if there is
+                  no such item.
+        """
+        try:
+            return self._items[key]
+        except KeyError:
+            pass
+        for item in self._iterator:
+            item_key = self._key(item)
+            self._items.setdefault(item_key, item)
+            if item_key == key:
+                return self._items[key]
+        return default
+
+    def __getitem__(self, key):
+        item = self.get(key, self)
+        if item is self:
+            raise KeyError(key)
+        return item
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    def as_dict(self):
+        """
+        :returns: A dict from key to item for every item, reading any items
+                  that have not been read yet.
+        """
+        for item in self._iterator:
+            self._items.setdefault(self._key(item), item)
+        return dict(self._items)
+
+
 class FetchMarshall(object):
 
     def __init__(self, fetcher, processor, terminator=None, start_at=1):
@@ -74,7 +74,8 @@ def handle_command_line_options(args):
     if args.echo:
         from okcupyd import db
         db.echo = True
-        db.Session.kw['bind'].echo = True
+        if db.engine is not None:
+            db.engine.echo = True
     return args
 
 
@@ -15,9 +15,10 @@ setup(
     version=version,
     packages=find_packages(exclude=('tests*', 'examples')),
     install_requires=['lxml', 'requests >= 2.4.1', 'simplejson',
-                      'sqlalchemy >= 0.9.0', 'ipython >= 2.2.0',
+                      'sqlalchemy >= 1.1.0', 'ipython >= 2.2.0',
                       'wrapt >= 1.10.0', 'coloredlogs == 5.0', 'invoke >= 0.9',
                       'six >= 1.8.0'],
+    extras_require={'columnar': ['numpy']},
     tests_require=['tox', 'pytest', 'mock', 'contextlib2', 'vcrpy >= 1.7.0'],
     package_data={'': ['*.md', '*.rst']},
     author="Ivan Malison",
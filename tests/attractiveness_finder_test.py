@@ -1,9 +1,23 @@
+import sqlite3
+import threading
+
 import mock
 import pytest
 
 from . import util
+from okcupyd import attractiveness_finder as attractiveness_finder_module
+from okcupyd import json_search
 from okcupyd.attractiveness_finder import _AttractivenessFinder, \
-    AttractivenessFinder
+    AttractivenessFinder, CachedAttractivenessFinder, \
+    MemoryAttractivenessStore, RoundedAttractivenessFinder, \
+    SQLiteAttractivenessStore
+
+
+@pytest.fixture(autouse=True)
+def default_stores():
+    with mock.patch.dict(attractiveness_finder_module._default_stores,
+                         clear=True):
+        yield
 
 
 @pytest.fixture
@@ -65,3 +79,253 @@ def cached_attractiveness_finder():
 @util.use_cassette(path='attractiveness_finder_live')
 def test_attractiveness_finder_live(cached_attractiveness_finder):
     assert cached_attractiveness_finder('narichardson') == 3000
+
+
+@mock.patch('okcupyd.attractiveness_finder.search')
+def test_k_ary_attractiveness_finder(mock_search, mock_session):
+    user_to_attractiveness = {'user_one': 4875, 'user_two': 9212,
+                              'user_three': 0}
+    def mock_search_function(session, attractiveness_min=0,
+                             attractiveness_max=10000, keywords='', **kwargs):
+        if (attractiveness_min <= user_to_attractiveness[keywords] <=
+            attractiveness_max):
+            return [mock.Mock(username=keywords)]
+    mock_search.side_effect = mock_search_function
+
+    thread_count = threading.active_count()
+    finder = _AttractivenessFinder(mock_session, branching_factor=5)
+    for username, attractiveness in user_to_attractiveness.items():
+        mock_search.reset_mock()
+        assert abs(finder(username, accuracy=1) - attractiveness) <= 1
+        # 10000 -> 2000 -> 400 -> 80 -> 16 -> 4 -> 1
+        assert mock_search.call_count <= 6 * 4
+
+    assert AttractivenessFinder(mock_session,
+                                branching_factor=4)('user_two') == 9000
+    # The threads that queried ranges concurrently are not left running.
+    assert threading.active_count() == thread_count
+
+
+@mock.patch('okcupyd.attractiveness_finder.html_search.SearchFetchable')
+def test_find_attractiveness_many(mock_search_fetchable, mock_session):
+    user_to_attractiveness = {'user_one': 5875, 'User_Two': 9212,
+                              'user_three': 1200}
+    def mock_search_function(session, attractiveness_min=0,
+                             attractiveness_max=10000, keywords='', **kwargs):
+        return [mock.Mock(username=username.lower())
+                for username in keywords.split()
+                if attractiveness_min <= user_to_attractiveness.get(
+                    username, -1
+                ) <= attractiveness_max]
+    mock_search_fetchable.side_effect = mock_search_function
+
+    finder = AttractivenessFinder(mock_session)
+    usernames = list(user_to_attractiveness) + ['missing']
+    assert finder.find_attractiveness_many(usernames) == {
+        'user_one': 6000, 'User_Two': 9000, 'user_three': 1000,
+        'missing': None
+    }
+    assert mock_search_fetchable.call_count == 11
+
+    # Results are cached for subsequent lookups.
+    assert finder('user_one') == 6000
+    assert finder.find_attractiveness_many(['user_three']) == {
+        'user_three': 1000
+    }
+    assert mock_search_fetchable.call_count == 11
+
+    # Users that were not found are searched for again.
+    assert finder.find_attractiveness_many(['missing']) == {'missing': None}
+    assert mock_search_fetchable.call_count == 22
+
+
+@mock.patch('okcupyd.attractiveness_finder.html_search.SearchFetchable')
+@mock.patch('okcupyd.attractiveness_finder.search')
+def test_find_attractiveness_many_agrees_with_find_attractiveness(
+    mock_search, mock_search_fetchable, mock_session
+):
+    user_to_attractiveness = {'user_one': 5875, 'user_two': 9212,
+                              'user_three': 1200, 'user_four': 3100,
+                              'user_five': 0, 'user_six': 10000}
+    def mock_search_function(session, attractiveness_min=0,
+                             attractiveness_max=10000, keywords='', **kwargs):
+        return [mock.Mock(username=username)
+                for username in keywords.split()
+                if attractiveness_min <= user_to_attractiveness[username]
+                <= attractiveness_max]
+    mock_search.side_effect = mock_search_function
+    mock_search_fetchable.side_effect = mock_search_function
+
+    finder = RoundedAttractivenessFinder(_AttractivenessFinder(mock_session))
+    assert finder.find_attractiveness_many(list(user_to_attractiveness)) == {
+        username: finder(username) for username in user_to_attractiveness
+    }
+
+
+@mock.patch('okcupyd.attractiveness_finder.html_search.SearchFetchable')
+def test_find_attractiveness_many_searches_in_groups(mock_search_fetchable,
+                                                     mock_session):
+    user_to_attractiveness = {'a': 600, 'b': 1200, 'c': 9800}
+    def mock_search_function(session, attractiveness_min=0,
+                             attractiveness_max=10000, keywords='', **kwargs):
+        return [mock.Mock(username=username)
+                for username in keywords.split()
+                if attractiveness_min <= user_to_attractiveness[username]
+                <= attractiveness_max]
+    mock_search_fetchable.side_effect = mock_search_function
+
+    finder = _AttractivenessFinder(mock_session)
+    assert finder.find_attractiveness_many(['a', 'b', 'c'], group_size=2) == {
+        'a': 1000, 'b': 1000, 'c': 10000
+    }
+    searches = [(call[1]['keywords'], call[1]['count'])
+                for call in mock_search_fetchable.call_args_list]
+    assert searches[:2] == [('a b', 18), ('a b', 18)]
+    assert searches[2:] == [('c', 9)] * 11
+
+
+def test_single_lookups_use_the_json_search():
+    assert attractiveness_finder_module.search is json_search.search
+
+
+_match_card = u"""
+<div class="match_card">
+  <div class="username">{0}</div>
+  <span class="age">30</span><span class="location">Somewhere</span>
+  <button class="binary_rating_button" data-tuid="1"></button>
+</div>
+"""
+
+
+def test_find_attractiveness_many_builds_search_filters():
+    user_to_attractiveness = {'user_one': 5875, 'user_two': 1200}
+    requests = []
+    def okc_get(path, params):
+        requests.append(params)
+        if params.get('low', 1) > 1:
+            return mock.Mock(json=lambda: {'html': ''})
+        attractiveness_filter, = set(value for key, value in params.items()
+                                     if key.startswith('filter') and
+                                     value.startswith('25,'))
+        minimum, maximum = map(int, attractiveness_filter.split(',')[1:])
+        usernames = [username for username in params['keywords'].split()
+                     if minimum <= user_to_attractiveness.get(username, -1)
+                     <= maximum]
+        return mock.Mock(json=lambda: {'html': u''.join(
+            _match_card.format(username) for username in usernames + ['other']
+        )})
+
+    finder = _AttractivenessFinder(mock.Mock(okc_get=okc_get))
+    assert finder.find_attractiveness_many(
+        ['user_one', 'user_two', 'missing']
+    ) == {'user_one': 6000, 'user_two': 1000, 'missing': None}
+    first_request = requests[0]
+    assert first_request['keywords'] == 'missing user_one user_two'
+    assert first_request['count'] == 27
+    assert '0,63' in first_request.values()
+    assert '25,0,500' in first_request.values()
+    assert requests[-1]['keywords'] == 'missing'
+    assert requests[-1]['count'] == 9
+    assert '25,9500,10000' in requests[-1].values()
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = MemoryAttractivenessStore(max_size=2)
+    store['a'] = 1000
+    store['b'] = None
+    assert store['a'] == 1000
+    store['c'] = 3000
+    assert len(store) == 2
+    with pytest.raises(KeyError):
+        store['b']
+    assert store['a'] == 1000
+    assert store['c'] == 3000
+
+
+@mock.patch('okcupyd.attractiveness_finder.time')
+def test_stores_expire_entries(mock_time, tmpdir):
+    mock_time.time.return_value = 100
+    for store in (MemoryAttractivenessStore(ttl=10),
+                  SQLiteAttractivenessStore(str(tmpdir.join('af.db')),
+                                            ttl=10)):
+        store['a'] = 1000
+        mock_time.time.return_value = 105
+        assert store['a'] == 1000
+        mock_time.time.return_value = 111
+        with pytest.raises(KeyError):
+            store['a']
+        mock_time.time.return_value = 100
+
+
+def test_sqlite_store_is_shared(tmpdir):
+    file_path = str(tmpdir.join('af.db'))
+    with SQLiteAttractivenessStore(file_path) as store:
+        store['user'] = None
+    with SQLiteAttractivenessStore(file_path) as store:
+        assert store['user'] is None
+        assert len(store) == 1
+
+
+@mock.patch('okcupyd.attractiveness_finder.time')
+def test_sqlite_store_purges_expired_entries(mock_time, tmpdir):
+    file_path = str(tmpdir.join('af.db'))
+    mock_time.time.return_value = 100
+    with SQLiteAttractivenessStore(file_path, ttl=10) as store:
+        store['a'] = 1000
+        store['b'] = 2000
+        mock_time.time.return_value = 105
+        store['b'] = 2000
+        mock_time.time.return_value = 111
+        assert len(store) == 1
+    with SQLiteAttractivenessStore(file_path) as store:
+        assert len(store) == 2
+
+    # Opening the store deletes the rows that expired while it was closed.
+    SQLiteAttractivenessStore(file_path, ttl=10).close()
+    with SQLiteAttractivenessStore(file_path) as store:
+        assert len(store) == 1
+        mock_time.time.return_value = 200
+        store['c'] = 3000
+    # Writing deletes the rows that have expired since.
+    with SQLiteAttractivenessStore(file_path, ttl=1000) as store:
+        mock_time.time.return_value = 1106
+        store['d'] = 4000
+    with SQLiteAttractivenessStore(file_path) as store:
+        assert len(store) == 2
+
+
+def test_cached_attractiveness_finder_hit_rate():
+    finder = mock.Mock(return_value=4000)
+    cached_finder = CachedAttractivenessFinder(
+        finder, store=MemoryAttractivenessStore()
+    )
+    assert cached_finder.hit_rate == 0
+    assert cached_finder('User') == 4000
+    assert cached_finder('user') == 4000
+    assert cached_finder('USER') == 4000
+    assert finder.call_count == 1
+    assert cached_finder.hits == 2
+    assert cached_finder.misses == 1
+    assert cached_finder.hit_rate == 2.0/3
+
+
+@mock.patch('okcupyd.attractiveness_finder.settings')
+def test_default_store_is_shared_between_finders(mock_settings, tmpdir):
+    mock_settings.AF_CACHE_FILE = str(tmpdir.join('af.db'))
+    mock_settings.AF_CACHE_TTL = None
+    first = CachedAttractivenessFinder(mock.Mock(return_value=4000))
+    second = CachedAttractivenessFinder(mock.Mock(return_value=5000))
+    assert first._cache is second._cache
+    assert first('user') == 4000
+    assert second('user') == 4000
+    assert (second.hits, second.misses) == (1, 1)
+
+    mock_settings.AF_CACHE_TTL = 10
+    assert CachedAttractivenessFinder(mock.Mock())._cache is not first._cache
+
+
+def test_sqlite_store_closes_as_context_manager(tmpdir):
+    with SQLiteAttractivenessStore(str(tmpdir.join('af.db'))) as store:
+        store['user'] = 1000
+    with pytest.raises(sqlite3.ProgrammingError):
+        len(store)
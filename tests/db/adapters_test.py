@@ -1,5 +1,9 @@
+import mock
+import pytest
+
 from okcupyd.db import txn, model
-from okcupyd.db.adapters import ThreadAdapter
+from okcupyd.db.adapters import (ProfileSnapshotAdapter, ThreadAdapter,
+                                 ThreadBatchAdapter, UserResolver)
 
 
 def test_thread_adapter_create_and_update(T):
@@ -50,3 +54,80 @@ def test_thread_adapter_create_and_update(T):
 
     T.ensure.thread_model_resembles_okcupyd_thread(second_thread_model,
                                                    second_thread)
+
+
+def test_thread_batch_adapter_create_and_update(T):
+    threads = [T.build_mock.thread(initiator='initiator', respondent='one'),
+               T.build_mock.thread(initiator='initiator', respondent='two')]
+
+    thread_models, new_messages = ThreadBatchAdapter(threads).get_threads()
+    assert len(new_messages) == 4
+    for thread_model, thread in zip(thread_models, threads):
+        T.ensure.thread_model_resembles_okcupyd_thread(thread_model, thread)
+    assert thread_models[0].initiator.id == thread_models[1].initiator.id
+
+    threads[1].messages.append(
+        T.build_mock.message(sender='two', recipient='initiator',
+                             content='other')
+    )
+    other_thread_models, new_messages = ThreadBatchAdapter(
+        threads
+    ).get_threads()
+    assert [message.text for message in new_messages] == ['other']
+    assert ([thread_model.id for thread_model in other_thread_models] ==
+            [thread_model.id for thread_model in thread_models])
+
+    with txn() as session:
+        loaded_thread_model = model.MessageThread.find_no_txn(
+            session, threads[1].id, id_key='okc_id'
+        )
+        T.ensure.thread_model_resembles_okcupyd_thread(
+            loaded_thread_model, threads[1]
+        )
+        assert [message.thread_index
+                for message in loaded_thread_model.messages] == [0, 1, 2]
+
+
+def test_user_resolver_memoizes_and_loads_usernames(T):
+    known = T.factory.user('known')
+    okc_session = mock.Mock()
+    okc_session.get_profile.side_effect = T.build_mock.profile
+    resolver = UserResolver(okc_session)
+
+    username_to_user = resolver.resolve(['known', 'unknown'])
+    assert username_to_user['known'].id == known.id
+    assert username_to_user['unknown'].handle == 'unknown'
+    okc_session.get_profile.assert_called_once_with('unknown')
+
+    with mock.patch.object(model.User, 'build_query') as build_query:
+        again = resolver.resolve(['unknown', T.build_mock.profile('known')])
+    assert not build_query.called
+    assert again['unknown'].id == username_to_user['unknown'].id
+    assert len(model.User.query()) == 2
+
+
+def test_user_resolver_requires_a_session_for_unknown_usernames(T):
+    T.factory.user('known')
+    resolver = UserResolver()
+    assert resolver.resolve(['known'])['known'].handle == 'known'
+    with pytest.raises(ValueError):
+        resolver.resolve(['unknown'])
+    assert len(model.User.query()) == 1
+
+
+def test_profile_snapshot_adapter_skips_unchanged_profiles(T):
+    profiles = [T.build_mock.profile('one'), T.build_mock.profile('two')]
+    contents = {'one': {'essays': {'self_summary': 'hi'}},
+                'two': {'match_percentage': 90}}
+    with mock.patch.object(model.ProfileSnapshot, 'content_from_profile',
+                           side_effect=lambda p: dict(contents[p.username])):
+        assert len(ProfileSnapshotAdapter(profiles).save()) == 2
+        contents['two'] = {'match_percentage': 95}
+        snapshots = ProfileSnapshotAdapter(profiles).save()
+
+    assert [snapshot.match_percentage for snapshot in snapshots] == [95]
+    with txn() as session:
+        assert session.query(model.ProfileSnapshot).count() == 3
+        latest = model.ProfileSnapshot.latest_no_txn(session)
+        assert sorted((snapshot.user.handle, snapshot.match_percentage)
+                      for snapshot in latest) == [('one', None), ('two', 95)]
@@ -1,4 +1,5 @@
 import datetime
+import threading
 
 import mock
 import pytest
@@ -112,6 +113,48 @@ def test_mailbox_sync_creates_message_rows(T, mailbox_sync, mock_user):
             )
 
 
+class FakeThread(object):
+
+    def __init__(self, day, messages=('hi',), deleted=False):
+        self.datetime = datetime.datetime(2015, 1, day)
+        self.messages = list(messages)
+        self._deleted = deleted
+        self.checked_from = None
+
+    @property
+    def with_deleted_user(self):
+        self.checked_from = threading.current_thread()
+        return self._deleted
+
+
+@mock.patch('okcupyd.db.mailbox.adapters')
+@mock.patch('okcupyd.db.mailbox.fetch_messages')
+def test_sync_fetches_pages_of_threads_concurrently(fetch_messages, adapters):
+    adapters.ThreadBatchAdapter.side_effect = lambda threads, **kwargs: \
+        mock.Mock(get_threads=lambda: (threads, ['message']))
+    threads = [FakeThread(10), FakeThread(9), FakeThread(8, messages=()),
+               FakeThread(7, deleted=True), FakeThread(6)]
+    user = mock.Mock()
+    sync = Sync(user, concurrency=4, page_size=2)
+
+    assert sync._sync_mailbox_until(threads, datetime.datetime(2015, 1, 7)) \
+        == (threads[0].datetime, threads[:2], ['message', 'message'])
+
+    adapters.UserResolver.assert_called_once_with(concurrency=4)
+    assert fetch_messages.call_args_list == [
+        mock.call(threads[:2], concurrency=4),
+        mock.call(threads[2:4], concurrency=4)
+    ]
+    assert [call[0][0] for call in
+            adapters.ThreadBatchAdapter.call_args_list] == [threads[:2], []]
+    assert all(thread.user_profile is user.profile for thread in threads[:4])
+    # The first page was checked for deleted users from worker threads.
+    assert threads[0].checked_from is not threading.current_thread()
+    assert threads[1].checked_from is not threading.current_thread()
+    assert threads[2].checked_from is None
+    assert threads[4].checked_from is None
+
+
 @util.use_cassette
 def test_mailbox_sync_integration(T):
     user = User()
@@ -0,0 +1,49 @@
+import mock
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.dialects import postgresql
+
+from okcupyd.db import migrate, model
+
+
+def test_migrate_okc_ids_converts_string_backed_tables(tmpdir):
+    engine = create_engine('sqlite:///{0}'.format(tmpdir.join('old.db')))
+    engine.execute('CREATE TABLE user (id INTEGER PRIMARY KEY, '
+                   'created_at DATETIME NOT NULL, okc_id VARCHAR NOT NULL '
+                   'UNIQUE, handle VARCHAR NOT NULL, age VARCHAR NOT NULL, '
+                   'location VARCHAR NOT NULL)')
+    engine.execute("INSERT INTO user VALUES (1, '2015-01-01 00:00:00', "
+                   "'18267519015730576361', 'big', '30', 'here')")
+
+    assert migrate.migrate_okc_ids(engine) == ['user']
+    migrate.create_indexes(engine)
+
+    okc_id_column, = [column for column in inspect(engine).get_columns('user')
+                      if column['name'] == 'okc_id']
+    assert 'INT' in str(okc_id_column['type'])
+    assert 'ix_user_handle' in [index['name'] for index in
+                                inspect(engine).get_indexes('user')]
+    row = engine.execute(model.User.__table__.select()).first()
+    assert (row['id'], row['okc_id']) == (1, 18267519015730576361)
+
+    assert migrate.migrate_okc_ids(engine) == []
+
+
+def test_postgresql_migration_uses_exact_bounds():
+    connection = mock.Mock(dialect=postgresql.dialect())
+    migrate._alter_postgresql_column(connection, model.User.__table__)
+    statement, = connection.execute.call_args[0]
+    assert statement == (
+        'ALTER TABLE "user" ALTER COLUMN okc_id TYPE BIGINT USING '
+        '(CASE WHEN okc_id::numeric >= 9223372036854775808::numeric '
+        'THEN okc_id::numeric - 18446744073709551616::numeric '
+        'ELSE okc_id::numeric END)::bigint'
+    )
+
+
+def test_migrate_okc_ids_rejects_other_dialects():
+    engine = mock.Mock()
+    engine.dialect.name = 'mysql'
+    with pytest.raises(ValueError):
+        migrate.migrate_okc_ids(engine)
+    assert not engine.begin.called
@@ -4,6 +4,7 @@ from sqlalchemy.orm.exc import NoResultFound
 
 from okcupyd import db
 from okcupyd.db import model
+from okcupyd.essay import Essays
 
 
 def test_integrity_error_on_okc_id_handled_by_safe_upsert():
@@ -52,4 +53,112 @@ def test_upsert():
     assert loaded_from_v1.handle == v2.handle
     assert v2.handle == new_user_2.handle
     assert v2.handle == 'other'
-    assert len(model.User.query()) == 1
\ No newline at end of file
+    assert len(model.User.query()) == 1
+
+
+def test_bulk_upsert_updates_only_assigned_columns():
+    user = model.User.upsert_okc(model.User(handle='fun', okc_id=1, age=40,
+                                            location='Washington, D.C.'))
+    updated = model.User.upsert_okc(model.User(handle='renamed', okc_id=1))
+
+    assert updated.id == user.id
+    assert updated.handle == 'renamed'
+    assert updated.location == 'Washington, D.C.'
+    assert len(model.User.query()) == 1
+
+
+def test_bulk_upsert_returns_persistent_models():
+    with db.txn() as session:
+        existing = model.User(handle='fun', okc_id=1, age=40, location='here')
+        session.add(existing)
+    with db.txn() as session:
+        id_to_user = model.User.bulk_upsert_no_txn(session, [
+            model.User(handle='renamed', okc_id='1', age=40, location='here'),
+            model.User(handle='new', okc_id='2', age=30, location='there')
+        ], id_key='okc_id')
+        assert sorted(id_to_user) == [1, 2]
+        assert all(user in session for user in id_to_user.values())
+    assert id_to_user[1].id == existing.id
+    assert id_to_user[1].handle == 'renamed'
+    assert id_to_user[2].id == model.User.find(2, id_key='okc_id').id
+    assert id_to_user[2].handle == 'new'
+
+
+def test_bulk_upsert_with_explicit_id_conflicts_on_id_key():
+    user = model.User.upsert_okc(model.User(handle='fun', okc_id=1, age=40,
+                                            location='here'))
+    other = model.User.upsert_okc(model.User(id=user.id, handle='other',
+                                             okc_id=2, age=30,
+                                             location='there'))
+    assert other.id != user.id
+    assert model.User.find(user.id).handle == 'fun'
+    assert model.User.find(2, id_key='okc_id').id == other.id
+
+
+def test_bulk_upsert_resolves_relationships():
+    initiator, respondent = [
+        model.User(handle=handle, okc_id=okc_id, age=30, location='here')
+        for okc_id, handle in enumerate(('initiator', 'respondent'))
+    ]
+    with db.txn() as session:
+        session.add_all([initiator, respondent])
+        id_to_thread = model.MessageThread.bulk_upsert_no_txn(session, [
+            model.MessageThread(okc_id=okc_id, initiator=initiator,
+                                respondent=respondent)
+            for okc_id in (5, 6)
+        ], id_key='okc_id')
+    assert sorted(id_to_thread) == [5, 6]
+    for thread in id_to_thread.values():
+        assert thread.initiator_id == initiator.id
+        assert thread.respondent_id == respondent.id
+
+
+def test_bulk_upsert_falls_back_without_native_upserts():
+    with mock.patch.object(db, '_supports_upsert', return_value=False), \
+         mock.patch.object(model.User, 'upsert_no_txn',
+                           wraps=model.User.upsert_no_txn) as upsert_no_txn:
+        model.User.upsert_okc(model.User(handle='fun', okc_id=1, age=40,
+                                         location='here'))
+    assert upsert_no_txn.called
+    assert model.User.find(1, id_key='okc_id').handle == 'fun'
+
+
+def test_get_engine_is_lazy_and_applies_sqlite_pragmas(tmpdir):
+    db_url = 'sqlite:///{0}'.format(tmpdir.join('test.db'))
+    db.Base.metadata.bind = None
+    with mock.patch.object(db.settings, 'DB_URL', db_url), \
+         mock.patch.object(db, 'engine', None):
+        engine = db.get_engine()
+        assert str(engine.url) == db_url
+        assert db.get_engine() is engine
+        connection = engine.connect()
+        try:
+            assert connection.execute('PRAGMA journal_mode').scalar() == 'wal'
+            assert connection.execute('PRAGMA synchronous').scalar() == 1
+            assert connection.execute('PRAGMA busy_timeout').scalar() == 30000
+        finally:
+            connection.close()
+
+
+def test_unsigned_big_integer_round_trips_large_ids():
+    okc_id = 18267519015730576361
+    model.User.upsert_okc(model.User(handle='big', okc_id=okc_id, age=30,
+                                     location='here'))
+    assert model.User.find(okc_id, id_key='okc_id').okc_id == okc_id
+
+
+def test_profile_snapshot_content_from_profile():
+    profile = mock.Mock(match_percentage=80, enemy_percentage=10,
+                        photo_infos=[mock.Mock(id=1), mock.Mock(id=2)])
+    profile.details.as_dict = {'height': '5\' 10"'}
+    profile.essays = mock.Mock(**{name: u'essay'
+                                  for _, name in Essays.essay_names.values()})
+    profile.looking_for = mock.Mock(ages=(20, 30), single=True, near_me=True,
+                                    kinds=['new friends'], gentation='')
+    content = model.ProfileSnapshot.content_from_profile(profile)
+
+    assert content['photo_ids'] == [1, 2]
+    assert content['looking_for']['ages'] == [20, 30]
+    assert set(content) == set(model.ProfileSnapshot.content_columns)
+    assert (model.ProfileSnapshot.from_content(content).content_hash ==
+            model.ProfileSnapshot.hash_content(dict(content)))
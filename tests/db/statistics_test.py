@@ -0,0 +1,31 @@
+import datetime
+
+from okcupyd.db.adapters import ThreadBatchAdapter
+from okcupyd.db.statistics import Statistics
+
+
+def test_statistics_from_stored_threads(T):
+    threads = [T.build_mock.thread(initiator='me', respondent='one'),
+               T.build_mock.thread(initiator='me', respondent='two',
+                                   message_count=1),
+               T.build_mock.thread(initiator='three', respondent='me',
+                                   message_count=3),
+               T.build_mock.thread(initiator='four', respondent='five')]
+    for message in threads[2].messages:
+        message.time_sent = datetime.datetime(2014, 5, 1, 12)
+    ThreadBatchAdapter(threads).get_threads()
+
+    statistics = Statistics(T.build_mock.profile('me').id)
+    assert statistics.count == 3
+    assert statistics.response_rate == 2.0/3
+    assert statistics.portion_initiated == 2.0/3
+    assert statistics.average_conversation_length == 2
+    assert statistics.average_first_message_length == 1
+    assert statistics.no_responses.count == 1
+    assert ([thread.okc_id for thread in statistics.received.threads] ==
+            [threads[2].id])
+
+    may = statistics.time_filter(min_date=datetime.date(2014, 5, 1))
+    assert may.count == 1
+    assert statistics.time_filter(max_date=datetime.date(2014, 5, 1)).count == 3
+    assert may.has_response.initiated.count == 0
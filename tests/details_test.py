@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import mock
+
 from okcupyd import User
 from okcupyd import details
 from okcupyd.magicnumbers import maps
@@ -267,3 +269,19 @@ def test_handle_no_fluency_lanaguages(vcr_live_sleep):
     details.languages = [('spanish', None)]
     vcr_live_sleep(sleep_time)
     assert details.languages == [('Spanish', None)]
+
+
+def test_as_dict_matches_detail_attributes():
+    profile_details = details.Details(mock.Mock())
+    profile_details.id_to_display_name_value = {
+        'height': u'5′ 10″', 'ethnicities': u'White, Other',
+        'languages': u'English (Fluently), Spanish (Okay)',
+        'smoking': u'—'
+    }
+    as_dict = profile_details.as_dict
+    assert as_dict == {name: getattr(profile_details, name)
+                       for name, _ in details.Details.name_detail_pairs()}
+    assert as_dict['height'] == u'5\' 10"'
+    assert as_dict['smokes'] is None
+    assert as_dict['languages'] == [(u'english', u'fluently'),
+                                    (u'spanish', u'okay')]
@@ -0,0 +1,82 @@
+import mock
+import simplejson
+import six
+
+from okcupyd import export
+from okcupyd.json_search import SearchJSONFetcher
+from okcupyd.profile import Profile
+
+
+def load_response(filename):
+    with open(filename, 'r') as file:
+        return simplejson.loads(file.read())
+
+
+def test_export_search_jsonl_with_projection():
+    response = load_response('search_response.json')
+    second_response = load_response('second_search_response.json')
+    output = six.StringIO()
+    with mock.patch.object(SearchJSONFetcher, 'fetch',
+                           side_effect=[response, second_response, {}]):
+        written = export.export_search(
+            output, session=mock.Mock(),
+            fields=('username', 'location.state_code', 'missing.field')
+        )
+    records = [simplejson.loads(line)
+               for line in output.getvalue().splitlines()]
+    expected = response['data'] + second_response['data']
+    assert written == len(expected) == len(records)
+    assert records[0] == {
+        'username': expected[0]['username'],
+        'location.state_code': expected[0]['location']['state_code'],
+        'missing.field': None
+    }
+
+
+def test_export_search_respects_limit():
+    response = load_response('search_response.json')
+    output = six.StringIO()
+    with mock.patch.object(SearchJSONFetcher, 'fetch',
+                           side_effect=[response, {}]) as mock_fetch:
+        assert export.export_search(output, session=mock.Mock(),
+                                    limit=2) == 2
+    assert mock_fetch.call_count == 1
+    assert len(output.getvalue().splitlines()) == 2
+
+
+def test_columnar_export_writes_chunks():
+    records = [{'username': 'a', 'age': 20}, {'username': 'b'},
+               {'username': 'c', 'age': 30}]
+    output = six.StringIO()
+    assert export.export(records, output, format='columnar',
+                         chunk_size=2) == 3
+    chunks = [simplejson.loads(line)
+              for line in output.getvalue().splitlines()]
+    assert chunks == [
+        {'count': 2, 'columns': {'username': ['a', 'b'], 'age': [20, None]}},
+        {'count': 1, 'columns': {'username': ['c'], 'age': [30]}},
+    ]
+
+
+def test_columnar_export_keeps_keys_first_seen_in_later_chunks():
+    records = [{'username': 'a', 'age': 20}, {'username': 'b', 'age': 25},
+               {'username': 'c', 'match': 90}]
+    output = six.StringIO()
+    assert export.export(records, output, format='columnar',
+                         chunk_size=2) == 3
+    chunks = [simplejson.loads(line)
+              for line in output.getvalue().splitlines()]
+    assert chunks == [
+        {'count': 2, 'columns': {'username': ['a', 'b'], 'age': [20, 25]}},
+        {'count': 1, 'columns': {'username': ['c'], 'match': [90]}},
+    ]
+
+
+def test_export_profiles_uses_loaded_values_only():
+    session = mock.Mock()
+    profile = Profile(session, 'username', age=24)
+    output = six.StringIO()
+    export.export([profile], output)
+    assert simplejson.loads(output.getvalue()) == {'username': 'username',
+                                                   'age': 24}
+    assert not session.okc_get.called
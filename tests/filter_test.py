@@ -45,3 +45,85 @@ def test_filter_building():
 def test_minimum_age_filter_building():
     assert json_search_filters.build(minimum_age=22)['minimum_age'] == 22
     assert json_search_filters.build(maximum_age=22)['maximum_age'] == 22
+
+
+def test_filter_plan_rebuilt_on_registration():
+    filters = Filters()
+    class AFilter(filters.filter_class):
+
+        def transform(incoming):
+            return incoming + "output"
+
+    plan = filters.plan
+    assert filters.build(incoming="test") == {"incoming": "testoutput"}
+
+    class FilterTwo(filters.filter_class):
+
+        output_key = "second"
+
+        def transform(other):
+            return other + "two"
+
+    assert filters.plan is not plan
+    assert filters.build(incoming="test", other="a") == {
+        "incoming": "testoutput",
+        "second": "atwo"
+    }
+
+
+def test_filter_plan_caches_builds():
+    calls = []
+    filters = Filters()
+    class AFilter(filters.filter_class):
+
+        def transform(incoming):
+            calls.append(incoming)
+            return list(incoming)
+
+    first = filters.build(incoming=["a", "b"])
+    first['incoming'] = 'mutated'
+    assert filters.build(incoming=["a", "b"]) == {"incoming": ["a", "b"]}
+    assert calls == [["a", "b"]]
+
+    filters.build(incoming=["a", "c"])
+    assert len(calls) == 2
+
+    # Cached values are copied deeply.
+    filters.build(incoming=["a", "b"])['incoming'].append("mutated")
+    assert filters.build(incoming=["a", "b"]) == {"incoming": ["a", "b"]}
+
+    # Equal values of different types are cached separately.
+    assert filters.build(incoming=("a", "b")) == {"incoming": ["a", "b"]}
+    assert len(calls) == 3
+
+
+def test_filter_plan_cache_distinguishes_equal_values_of_other_types():
+    search_filters.plan.clear_cache()
+    assert '33,True' in \
+        search_filters.legacy_build(question_count_min=True).values()
+    assert set(search_filters.legacy_build(question_count_min=1).values()) == \
+        set(['33,1'])
+
+
+def test_filter_plan_only_considers_relevant_builders():
+    plan = search_filters.plan
+    candidates = plan.candidates({'religion': 'buddhist'})
+    assert set(candidate.output_key for candidate in candidates) == \
+        set(['religion'])
+
+
+def test_legacy_build_matches_uncompiled_build():
+    kwargs = dict(gentation='everybody', age_min=18, age_max=24,
+                  smokes=['no'], attractiveness_min=4000,
+                  has_kids='has a kid')
+    expected = {
+        u'filter{0}'.format(number): builder.transform(
+            *[kwargs.get(key) for key in builder.keys]
+        )
+        for number, builder in enumerate(
+            (builder for builder in search_filters.builders
+             if set(builder.keys).intersection(kwargs)), 1
+        )
+    }
+    assert search_filters.legacy_build(**kwargs) == expected
+    assert search_filters.legacy_build(**kwargs) == expected
@@ -2,6 +2,8 @@ import datetime
 
 import mock
 import pytest
+import requests
+from lxml import etree, html
 
 from okcupyd import helpers
 
@@ -74,3 +76,115 @@ def test_parse_time_on_contextual_descriptions(mock_datetime):
     assert helpers.parse_date_updated('Just Now!') == mock_datetime.now_
     assert helpers.parse_date_updated('Yesterday') == \
         mock_datetime.now_ - datetime.timedelta(days=1)
+
+
+def test_parse_date_updated_repeated_relative_dates_follow_the_clock(
+        mock_datetime
+):
+    assert helpers.parse_date_updated('Jan 12, 2013') == datetime.datetime(
+        year=2013, month=1, day=12
+    )
+    mock_datetime.now_ = mock_datetime(year=2015, month=3, day=4, hour=9)
+    assert helpers.parse_date_updated('Jan 12').year == 2015
+    assert helpers.parse_date_updated('8:30am').day == 4
+    mock_datetime.now_ = mock_datetime(year=2015, month=3, day=5, hour=8)
+    assert helpers.parse_date_updated('8:30am').day == 4
+    assert helpers.parse_date_updated('THURSDAY') == datetime.datetime(
+        year=2015, month=2, day=26
+    )
+
+
+def test_parse_date_updated_skips_log_formatting_when_disabled():
+    with mock.patch.object(helpers, 'simplejson') as simplejson, \
+         mock.patch.object(helpers.log, 'isEnabledFor', return_value=False):
+        helpers.parse_date_updated('11/22/99')
+    assert not simplejson.dumps.called
+
+
+def test_get_js_variables_collects_every_variable():
+    tree = html.fromstring(
+        '<html><head><script>var AUTHCODE = "code"; var SCREENNAME = "me";'
+        '</script><script>var CURRENTUSERID = "12"; var AUTHCODE = "other";'
+        '</script></head><body></body></html>'
+    )
+    assert helpers.get_authcode(tree) == 'code'
+    js_variables = helpers.get_js_variables(tree)
+    with mock.patch.object(helpers, 'xpb') as xpb:
+        assert helpers.find_js_variable(js_variables, 'CURRENTUSERID') == '12'
+        assert helpers.find_js_variable(js_variables, 'SCREENNAME') == 'me'
+    assert not xpb.script.apply_.called
+
+
+def test_get_js_variable_of_plain_etree():
+    tree = etree.fromstring(
+        '<html><script>var AUTHCODE = "code";</script></html>'
+    )
+    assert helpers.get_authcode(tree) == 'code'
+    with pytest.raises(AttributeError):
+        helpers.get_username(tree)
+
+
+def test_replace_chars():
+    assert helpers.replace_chars(
+        u'I\u2019m \u2014 \u201cok\u201d\u2026 \U0001f332'
+    ) == u'I\'m - "ok"...  '
+    assert helpers.replace_chars('plain') == 'plain'
+
+
+def _messager(responses):
+    session = mock.Mock()
+    session.okc_get.return_value.json.side_effect = responses
+    messager = helpers.Messager(session)
+    messager._get_authcode = mock.Mock(side_effect=['first', 'second', 'third'])
+    return messager
+
+
+def test_send_many_reuses_authcode():
+    messager = _messager([{'threadid': 1, 'msgid': 2},
+                          {'threadid': 3, 'msgid': 4}])
+    results = messager.send_many(['a', 'b'], lambda username: username * 2,
+                                 concurrency=1)
+    assert [result.message_info for result in results] == [
+        helpers.MessageInfo(1, 2), helpers.MessageInfo(3, 4)
+    ]
+    assert messager._get_authcode.call_count == 1
+    params = [call[1]['params']
+              for call in messager._session.okc_get.call_args_list]
+    assert [param['body'] for param in params] == ['aa', 'bb']
+    assert all(param['authcode'] == 'first' for param in params)
+
+
+def test_send_many_authcode_is_only_used_for_that_call():
+    messager = _messager([{'threadid': 1, 'msgid': 2},
+                          {'threadid': 3, 'msgid': 4}])
+    messager.send_many(['a'], 'hi', authcode='given')
+    messager.send_many(['b'], 'hi')
+    params = [call[1]['params']
+              for call in messager._session.okc_get.call_args_list]
+    assert [param['authcode'] for param in params] == ['given', 'first']
+
+
+def test_send_many_isolates_and_retries_failures():
+    messager = _messager([{'threadid': 1, 'msgid': 2}])
+    error = requests.HTTPError('500 Server Error')
+    messager._session.okc_get.side_effect = [
+        requests.ConnectionError(), messager._session.okc_get.return_value,
+        error, error
+    ]
+    results = messager.send_many(['a', 'b'], 'hi', concurrency=1, retries=1)
+
+    assert results[0] == helpers.SendResult('a', helpers.MessageInfo(1, 2),
+                                            None)
+    assert results[1] == helpers.SendResult('b', None, error)
+    assert messager._session.okc_get.call_count == 4
+    assert messager._get_authcode.call_count == 3
+
+
+def test_send_many_does_not_resend_after_a_parse_failure():
+    messager = _messager([{'threadid': 1}])
+    result, = messager.send_many(['a'], 'hi', retries=3)
+
+    assert result.message_info is None
+    assert isinstance(result.error, KeyError)
+    assert messager._session.okc_get.call_count == 1
+    assert messager._get_authcode.call_count == 1
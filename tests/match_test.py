@@ -0,0 +1,102 @@
+import mock
+import pytest
+
+from okcupyd import match
+from okcupyd.match import Answer, MatchScorer
+from okcupyd.question import MemoryQuestionCatalog
+
+
+numpy = pytest.importorskip('numpy')
+
+very, little, somewhat = 1, 4, 3
+
+
+@pytest.fixture
+def scorer():
+    return MatchScorer({1: Answer(1, (1,), very),
+                        2: Answer(2, (1, 2), little),
+                        3: Answer(1, (1, 2, 3), somewhat)})
+
+
+def test_score(scorer):
+    candidate = {1: Answer(1, (1,), very), 2: Answer(3, (2,), somewhat),
+                 4: Answer(1, (1,), very)}
+    user_satisfaction, candidate_satisfaction, common = \
+        scorer.satisfaction([candidate])
+    assert user_satisfaction[0] == pytest.approx(50.0/51)
+    assert candidate_satisfaction[0] == 1
+    assert common[0] == 2
+
+    match_percentage, enemy_percentage = scorer.score([candidate])
+    assert match_percentage[0] == pytest.approx(
+        (numpy.sqrt(50.0/51) - 0.5) * 100
+    )
+    assert enemy_percentage[0] == 0
+
+    scorer.margin_of_error = False
+    assert scorer.score([candidate])[0][0] == pytest.approx(
+        numpy.sqrt(50.0/51) * 100
+    )
+
+
+def test_rank_puts_unscored_candidates_last(scorer):
+    scorer.margin_of_error = False
+    ranking = scorer.rank({
+        'none_in_common': {4: Answer(1, (1,), very)},
+        'bad': {1: Answer(2, (2,), very)},
+        'good': {1: Answer(1, (1,), very)},
+    })
+    assert [identifier for identifier, _, _ in ranking] == \
+        ['good', 'bad', 'none_in_common']
+    assert ranking[0][1:] == (100, 0)
+    assert ranking[1][1:] == (0, 100)
+    assert numpy.isnan(ranking[2][1])
+
+
+def test_answers_from_user_questions():
+    def user_question(question_id, answer_id, matches):
+        options = [mock.Mock(id=option_id, is_match=option_id in matches)
+                   for option_id in (1, 2, 3)]
+        return mock.Mock(id=question_id, answer_id=answer_id,
+                         answer_options=options)
+    questions = mock.Mock(importance_name_to_fetchable={
+        'mandatory': [user_question(1, 2, (2, 3))],
+        'not_important': [user_question(2, 1, (1, 2, 3))]
+    })
+    assert match.answers_from_user_questions(questions) == {
+        1: Answer(2, (2, 3), 0), 2: Answer(1, (1, 2, 3), 5)
+    }
+
+
+def test_answers_from_questions():
+    catalog = MemoryQuestionCatalog()
+    catalog.add(1, 'Cats?', [(1, 'Yes'), (2, 'No')])
+    catalog.add(2, 'Dogs?')
+    questions = [
+        mock.Mock(id=1, answered=True, their_answer='No',
+                  my_answer_matches=True),
+        mock.Mock(id=2, answered=True, their_answer='Yes',
+                  my_answer_matches=True),
+        mock.Mock(id=3, answered=False),
+    ]
+    user_answers = {1: Answer(1, (1,), very), 2: Answer(1, (1,), very)}
+    assert match.answers_from_questions(questions, user_answers,
+                                        catalog=catalog) == {
+        1: Answer(2, (1,), match.default_importance)
+    }
+
+
+def test_compare():
+    report = match.compare([50, 75, numpy.nan], [52, 65, 90], tolerance=5)
+    assert report == (2, 6, 10, 0.5)
+    assert match.compare([numpy.nan], [1]).count == 0
+
+
+def test_validate(scorer):
+    scorer.margin_of_error = False
+    profile = mock.Mock(match_percentage=100, enemy_percentage=0)
+    with mock.patch.object(match, 'answers_from_questions',
+                           return_value={1: Answer(1, (1,), very)}):
+        reports = match.validate(scorer, [profile])
+    assert reports['match'] == (1, 0, 0, 1)
+    assert reports['enemy'] == (1, 0, 0, 1)
@@ -1,9 +1,15 @@
 import datetime
 
+import mock
 import pytest
 
 from . import util
 from okcupyd import User
+from lxml import html
+
+from okcupyd import errors
+from okcupyd.messaging import (MessageThread, ThreadIndex, fetch_messages,
+                               thread_record)
 
 
 @pytest.mark.xfail # :/ Not really clear how to test this.
@@ -116,3 +122,119 @@ def test_date_parsing_smoke():
             message.time_sent
     for thread in user.outbox:
         thread.datetime
+
+
+def _thread(correspondent, thread_id):
+    thread = mock.Mock(id=thread_id, correspondent=correspondent)
+    return thread
+
+
+def test_thread_index_is_case_insensitive():
+    thread_index = ThreadIndex()
+    thread_index.add(_thread('SomeUser', '123'))
+    assert thread_index.get('someuser') == '123'
+    assert thread_index.get('otheruser') is None
+    assert len(thread_index) == 1
+
+
+def test_thread_index_skips_threads_without_correspondent():
+    thread = mock.Mock(id='1')
+    type(thread).correspondent = mock.PropertyMock(
+        side_effect=errors.NoCorrespondentError
+    )
+    thread_index = ThreadIndex()
+    thread_index.add(thread)
+    assert len(thread_index) == 0
+
+
+def test_thread_index_discard_thread_ids():
+    thread_index = ThreadIndex()
+    thread_index.add(_thread('one', 1))
+    thread_index.add(_thread('two', 2))
+    thread_index.discard_thread_ids(['1'])
+    assert thread_index.get('one') is None
+    assert thread_index.get('two') == 2
+
+
+def test_thread_index_uses_loader_once():
+    loader = mock.Mock(return_value=5)
+    thread_index = ThreadIndex(loader=loader)
+    assert thread_index.get('Persisted') == 5
+    assert thread_index.get('persisted') == 5
+    loader.assert_called_once_with('Persisted')
+
+
+def test_user_message_uses_thread_index_without_paging():
+    user = User(mock.Mock())
+    user.thread_index['someone'] = '42'
+    user.inbox = mock.MagicMock()
+    user.outbox = mock.MagicMock()
+    user._message_sender = mock.Mock()
+    user._message_sender.send.return_value = mock.Mock(thread_id='42')
+
+    user.message('Someone', 'hi')
+
+    assert not user.inbox.__iter__.called
+    assert not user.outbox.__iter__.called
+    user._message_sender.send.assert_called_once_with(
+        'Someone', 'hi', thread_id='42'
+    )
+
+
+_thread_html = """
+<li class="thread message unreadMessage" data-threadid="123">
+  <div class="inner">
+    <a class="open" href="#">
+      <span class="subject"><span class="to">To</span> someone</span>
+    </a>
+    <span class="timestamp"><span class="fancydate">Jan 2, 2014</span></span>
+  </div>
+</li>
+"""
+
+
+def test_thread_record_matches_message_thread():
+    element = html.fromstring(_thread_html)
+    record = thread_record(element)
+    thread = MessageThread(mock.Mock(), element)
+    assert record == (thread.id, thread.correspondent, thread.datetime,
+                      thread.read)
+    assert record.correspondent == 'someone'
+    assert not record.read
+
+
+def test_message_thread_construction_is_lazy():
+    session = mock.Mock()
+    MessageThread(session, html.fromstring(_thread_html))
+    assert not session.get_profile.called
+
+
+def test_fetch_messages_populates_message_caches():
+    session = mock.Mock()
+    session.okc_get.return_value.content = (
+        b'<ul><li id="message_1" class="from_me"></li>'
+        b'<li id="message_2" class="to_me"></li></ul>'
+    )
+    threads = [MessageThread(session, html.fromstring(_thread_html))
+               for _ in range(3)]
+
+    assert fetch_messages(threads, concurrency=3) == threads
+    assert session.okc_get.call_count == 3
+
+    assert [message.id for message in threads[0].messages] == [1, 2]
+    fetch_messages(threads, concurrency=3)
+    assert session.okc_get.call_count == 3
+
+
+def test_fetch_messages_fetches_repeated_threads_once():
+    session = mock.Mock()
+    session.okc_get.return_value.content = (
+        b'<ul><li id="message_1" class="from_me"></li></ul>'
+    )
+    thread, other = [MessageThread(session, html.fromstring(_thread_html))
+                     for _ in range(2)]
+    threads = [thread, other, thread, thread]
+
+    assert fetch_messages(threads, concurrency=4) == threads
+    assert session.okc_get.call_count == 2
+    assert [message.id for message in thread.messages] == [1]
@@ -1,4 +1,10 @@
+from lxml import html
+import mock
+
 from okcupyd import User
+from okcupyd import question as question_module
+from okcupyd.question import AnswerOption, MemoryQuestionCatalog, \
+    SQLiteQuestionCatalog, UserQuestion, default_question_catalog
 
 from . import util
 
@@ -15,3 +21,78 @@ def test_question_answer_id_for_user_question():
 def test_question_answer_id_for_profile_question():
     user = User()
     assert isinstance(user.get_question_answer_id(user.quickmatch().questions[0]), int)
+
+
+_user_question_html = u"""
+<div class="question" data-qid="{0}">
+  <div class="qtext"><p> {1} </p></div>
+  <ul class="self_answers">
+    <li id="self_answers_{0}_1" class="mine match">Always</li>
+    <li id="self_answers_{0}_2" class=" ">Usually</li>
+    <li id="self_answers_{0}_3" class="match">Never</li>
+  </ul>
+</div>
+"""
+
+
+def _user_question(question_id, text, catalog):
+    return UserQuestion(
+        html.fragment_fromstring(_user_question_html.format(question_id, text)),
+        catalog=catalog
+    )
+
+
+def test_user_question_options_are_cataloged():
+    catalog = MemoryQuestionCatalog()
+    user_question = _user_question(35660, 'Do you floss?', catalog)
+    assert [option.text for option in user_question.answer_options] == \
+        ['Always', 'Usually', 'Never']
+    assert catalog.get(35660) == (
+        'Do you floss?', ((1, 'Always'), (2, 'Usually'), (3, 'Never'))
+    )
+
+    # The text and options of a cataloged question are never parsed again.
+    other = _user_question(35660, 'Not the text', catalog)
+    with mock.patch.object(AnswerOption, 'text'):
+        assert other.text == 'Do you floss?'
+        assert [(option.id, option.text, option.is_users, option.is_match)
+                for option in other.answer_options] == [
+            (1, 'Always', True, True), (2, 'Usually', False, False),
+            (3, 'Never', False, True)
+        ]
+    assert other.answer.text == 'Always'
+
+
+def test_catalog_keeps_first_text_and_fills_in_options():
+    catalog = MemoryQuestionCatalog()
+    assert catalog.add(1, 'first') == ('first', None)
+    assert catalog.add(1, 'second', [(1, 'Yes')]) == ('first', ((1, 'Yes'),))
+    assert catalog.add(1, 'third', [(2, 'No')]) == ('first', ((1, 'Yes'),))
+    assert len(catalog) == 1
+
+
+def test_sqlite_question_catalog_is_shared(tmpdir):
+    file_path = str(tmpdir.join('questions.db'))
+    _user_question(7, 'Cats or dogs?', SQLiteQuestionCatalog(file_path)).\
+        answer_options
+    catalog = SQLiteQuestionCatalog(file_path)
+    assert len(catalog) == 1
+    assert catalog.get(7) == (
+        'Cats or dogs?', ((1, 'Always'), (2, 'Usually'), (3, 'Never'))
+    )
+    assert catalog.get(8) is None
+
+
+@mock.patch.dict(question_module._default_catalogs, clear=True)
+@mock.patch('okcupyd.question.settings')
+def test_default_catalog_follows_settings(mock_settings, tmpdir):
+    mock_settings.QUESTION_CATALOG_FILE = None
+    memory_catalog = default_question_catalog()
+    assert isinstance(memory_catalog, MemoryQuestionCatalog)
+    assert default_question_catalog() is memory_catalog
+
+    mock_settings.QUESTION_CATALOG_FILE = str(tmpdir.join('questions.db'))
+    sqlite_catalog = default_question_catalog()
+    assert isinstance(sqlite_catalog, SQLiteQuestionCatalog)
+    assert sqlite_catalog.file_path == mock_settings.QUESTION_CATALOG_FILE
+    assert default_question_catalog() is sqlite_catalog
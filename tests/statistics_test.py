@@ -0,0 +1,76 @@
+import datetime
+
+import mock
+import pytest
+
+from okcupyd.statistics import ColumnarStatistics, Statistics
+
+
+numpy = pytest.importorskip('numpy')
+
+
+def build_thread(correspondent, senders, date, first_message='hey'):
+    messages = [mock.Mock(sender=sender, content=first_message)
+                for sender in senders]
+    return mock.Mock(correspondent=correspondent, messages=messages,
+                     message_count=len(messages), has_messages=bool(messages),
+                     initiator=senders[0] if senders else None,
+                     got_response=len(set(senders)) > 1,
+                     date=date)
+
+
+@pytest.fixture
+def user():
+    return mock.Mock(profile='me')
+
+
+@pytest.fixture
+def threads():
+    return [
+        build_thread('a', ['me', 'a', 'me'], datetime.date(2014, 1, 1),
+                     first_message='hello'),
+        build_thread('b', ['b'], datetime.date(2014, 2, 1)),
+        build_thread('c', ['me'], datetime.date(2014, 3, 1)),
+        build_thread('d', ['d', 'me'], datetime.date(2014, 4, 1)),
+    ]
+
+
+@pytest.fixture
+def attractiveness_finder():
+    finder = mock.Mock(spec=['find_attractiveness_many'])
+    finder.find_attractiveness_many.return_value = {
+        'a': 5000, 'b': None, 'c': 7000, 'd': 3000
+    }
+    return finder
+
+
+def test_columnar_statistics_match_statistics(user, threads,
+                                              attractiveness_finder):
+    statistics = Statistics(user, set(threads),
+                            attractiveness_finder=attractiveness_finder,
+                            concurrency=1)
+    columnar = statistics.columnar()
+
+    assert columnar.count == statistics.count == 4
+    assert columnar.response_rate == statistics.response_rate == .5
+    assert columnar.initiated.threads == statistics.initiated.threads
+    assert columnar.portion_initiated == .5
+    assert columnar.average_conversation_length == 1.75
+    assert columnar.average_first_message_length == 3.5
+    assert columnar.average_attractiveness == 5000
+    assert attractiveness_finder.find_attractiveness_many.call_count == 1
+
+
+def test_columnar_statistics_filters_combine(user, threads,
+                                             attractiveness_finder):
+    columnar = ColumnarStatistics(user, threads,
+                                  attractiveness_finder=attractiveness_finder,
+                                  concurrency=1)
+    recent = columnar.time_filter(min_date=datetime.date(2014, 2, 1))
+
+    assert recent.count == 3
+    assert recent.received.threads == set(threads[1::2])
+    assert recent.attractiveness_filter(min_attractiveness=4000).threads == \
+        set([threads[2]])
+    assert recent.has_attractiveness.count == 2
+    assert columnar.count == 4
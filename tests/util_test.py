@@ -1,5 +1,6 @@
 import itertools
 import operator
+import re
 
 import mock
 import pytest
@@ -108,6 +109,28 @@ def test_get_cached_properties():
     assert instance.count_prop == 2
 
 
+def test_bust_caches_by_group():
+    class PropClass(object):
+        @util.cached_property.in_groups('page')
+        def page_prop(self):
+            return object()
+
+        @util.cached_property
+        def other_prop(self):
+            return object()
+
+    instance = PropClass()
+    util.cached_property.bust_caches(instance)
+    page, other = instance.page_prop, instance.other_prop
+    with mock.patch.object(util.inspect, 'getmembers') as getmembers:
+        util.cached_property.bust_caches(instance, groups=('page',))
+        assert instance.other_prop is other
+        assert instance.page_prop is not page
+        util.cached_property.bust_caches(instance)
+        assert instance.other_prop is not other
+    assert not getmembers.called
+
+
 def test_overwrite_kwarg():
 
     @util.curry
@@ -203,6 +226,36 @@ def test_bool_on_fetchable():
     assert fetchable
 
 
+def test_fetchable_index_stops_at_found_item():
+    page_counter = mock.Mock()
+    def fetch():
+        for page in range(3):
+            page_counter()
+            for i in range(5):
+                yield mock.Mock(id=page * 5 + i)
+    fetchable = util.Fetchable(mock.Mock(fetch=fetch))
+    index = fetchable.index('id')
+
+    assert index.get(3).id == 3
+    assert page_counter.call_count == 1
+    assert index.get(1).id == 1
+    assert page_counter.call_count == 1
+    assert fetchable.index('id') is index
+
+    assert index.get(7).id == 7
+    assert page_counter.call_count == 2
+    assert index.get(100) is None
+    assert page_counter.call_count == 3
+    assert 14 in index
+    assert len(index.as_dict()) == 15
+
+    # The index and the fetchable share fetched items.
+    assert fetchable[7] is index[7]
+
+    fetchable.refresh()
+    assert fetchable.index('id') is not index
+
+
 def test_curry_on_classmethod():
     class TestClass(object):
 
@@ -256,3 +309,38 @@ def test_classmethods_still_classmethods_with_staticmethod_decorate_all():
 
     assert Test.test() == 1
     assert Test.a_classmethod() == 2
+
+
+def test_remap_prefers_earlier_expressions():
+    remap = util.REMap.from_string_pairs(
+        (('man', 2), ('woman', 1), ('^trans', 3), (r'(a)\1', 4)), default=0
+    )
+    assert len(remap._alternations) == 2
+    assert remap['woman'] == 2
+    assert remap['trans woman'] == 2
+    assert remap['transfeminine'] == 3
+    assert remap['baa'] == 4
+    assert remap['other'] == 0
+    with pytest.raises(KeyError):
+        remap._get_nodefault('other')
+
+    remap.add(re.compile('other'), 5)
+    assert remap['other'] == 5
+
+
+def test_remap_splits_alternations_at_group_limit():
+    remap = util.IndexedREMap(*['(w{0}w)'.format(i) for i in range(60)])
+    assert len(remap._alternations) == 2
+    assert remap['w59w w1w'] == 2
+    assert remap['w42w'] == 43
+
+
+def test_lru_cache_evicts_least_recently_used():
+    function = mock.Mock(side_effect=lambda x: x * 2)
+    cached = util.lru_cache(max_size=2)(lambda x: function(x))
+    assert [cached(1), cached(2), cached(1), cached(3)] == [2, 4, 2, 6]
+    assert function.call_count == 3
+    cached(1)
+    assert function.call_count == 3
+    cached(2)
+    assert function.call_count == 4